@@ -0,0 +1,362 @@
+"""Alert rules evaluated incrementally against rescored wallets.
+
+Rules live in memory in an AlertIndex keyed by (wallet, metric), with
+thresholds kept sorted so a metric change only visits the rules whose
+threshold lies between the old and the new value. top-N rules are
+grouped by N and evaluated from one ranking query per refresh. Only the
+worker running the score refresher evaluates rules, so the index is
+built on its first refresh; rule listings read alert_rules. Firings are
+stored in alert_events and paged from GET /alerts.
+"""
+import bisect
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# Metrics of a score change record that rules can watch
+ALERT_METRICS = (
+    "total_score",
+    "roi_percentage",
+    "winrate",
+    "total_trades",
+    "total_volume",
+    "total_pnl_usd",
+    "max_drawdown",
+    "sharpe_ratio",
+)
+ALERT_KINDS = ("metric_below", "metric_above", "enters_top")
+MAX_TOP_N = 1000
+
+RULE_COLUMNS = "id, user_id, kind, wallet_address, metric, threshold, top_n, created_at"
+
+INSERT_RULE_QUERY = f"""
+INSERT INTO alert_rules (user_id, kind, wallet_address, metric, threshold, top_n)
+VALUES (:user_id, :kind, :wallet_address, :metric, :threshold, :top_n)
+RETURNING {RULE_COLUMNS}
+"""
+
+LOAD_RULES_QUERY = f"SELECT {RULE_COLUMNS} FROM alert_rules"
+
+USER_RULES_QUERY = f"""
+SELECT {RULE_COLUMNS} FROM alert_rules
+WHERE user_id = :user_id
+ORDER BY id
+"""
+
+INSERT_EVENTS_QUERY = """
+INSERT INTO alert_events (rule_id, user_id, wallet_address, metric, value, previous_value, message)
+SELECT * FROM unnest(
+    CAST(:rule_id AS BIGINT[]),
+    CAST(:user_id AS TEXT[]),
+    CAST(:wallet_address AS TEXT[]),
+    CAST(:metric AS TEXT[]),
+    CAST(:value AS DOUBLE PRECISION[]),
+    CAST(:previous_value AS DOUBLE PRECISION[]),
+    CAST(:message AS TEXT[])
+)
+"""
+
+BASELINE_QUERY = f"""
+SELECT wallet_address, {", ".join(ALERT_METRICS)}
+FROM wallet_scores
+WHERE wallet_address = ANY(CAST(:wallets AS TEXT[]))
+"""
+
+# Changes whenever a rule is added (max id) or deleted (count), by any
+# worker process
+RULES_VERSION_QUERY = "SELECT COUNT(*), COALESCE(MAX(id), 0) FROM alert_rules"
+
+RANKING_QUERY = """
+SELECT wallet_address FROM wallet_scores
+ORDER BY total_score DESC, wallet_address
+LIMIT :limit
+"""
+
+
+def validate_rule(rule: dict):
+    """Raise ValueError unless the rule is complete for its kind"""
+    kind = rule.get("kind")
+    if kind not in ALERT_KINDS:
+        raise ValueError(f"kind must be one of {', '.join(ALERT_KINDS)}")
+    if kind == "enters_top":
+        top_n = rule.get("top_n")
+        if top_n is None or not 1 <= top_n <= MAX_TOP_N:
+            raise ValueError(f"top_n must be between 1 and {MAX_TOP_N}")
+    else:
+        if not rule.get("wallet_address"):
+            raise ValueError("wallet_address is required")
+        if rule.get("metric") not in ALERT_METRICS:
+            raise ValueError(f"metric must be one of {', '.join(ALERT_METRICS)}")
+        if rule.get("threshold") is None:
+            raise ValueError("threshold is required")
+
+
+class AlertIndex:
+    """In-memory rule index; evaluation touches only rules of changed wallets.
+
+    Firing is edge triggered: a below rule fires when the value crosses
+    from at or above its threshold to below it, and is re-armed once the
+    value comes back.
+    """
+
+    def __init__(self):
+        self.rules: Dict[int, dict] = {}
+        # wallet -> metric -> (sorted below [(threshold, rule_id)], sorted above [...])
+        self.watched: Dict[str, Dict[str, Tuple[list, list]]] = {}
+        # Last seen metrics of watched wallets
+        self.values: Dict[str, dict] = {}
+        # top_n -> rule ids
+        self.top_rules: Dict[int, set] = defaultdict(set)
+        self.ranking: List[str] = []
+
+    @property
+    def max_top_n(self) -> int:
+        return max(self.top_rules, default=0)
+
+    def add(self, rule: dict):
+        self.rules[rule["id"]] = rule
+        if rule["kind"] == "enters_top":
+            self.top_rules[rule["top_n"]].add(rule["id"])
+            return
+        metrics = self.watched.setdefault(rule["wallet_address"], {})
+        below, above = metrics.setdefault(rule["metric"], ([], []))
+        bucket = below if rule["kind"] == "metric_below" else above
+        bisect.insort(bucket, (rule["threshold"], rule["id"]))
+
+    def remove(self, rule_id: int) -> Optional[dict]:
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return None
+        if rule["kind"] == "enters_top":
+            ids = self.top_rules[rule["top_n"]]
+            ids.discard(rule_id)
+            if not ids:
+                del self.top_rules[rule["top_n"]]
+            return rule
+        wallet, metric = rule["wallet_address"], rule["metric"]
+        below, above = self.watched[wallet][metric]
+        (below if rule["kind"] == "metric_below" else above).remove((rule["threshold"], rule_id))
+        if not below and not above:
+            del self.watched[wallet][metric]
+            if not self.watched[wallet]:
+                del self.watched[wallet]
+                self.values.pop(wallet, None)
+        return rule
+
+    def wallets(self) -> List[str]:
+        return list(self.watched)
+
+    def set_baseline(self, wallet: str, metrics: dict):
+        self.values[wallet] = metrics
+
+    def _firing(self, rule_id: int, wallet: str, metric: str, value, previous, message: str) -> dict:
+        return {
+            "rule_id": rule_id,
+            "user_id": self.rules[rule_id]["user_id"],
+            "wallet_address": wallet,
+            "metric": metric,
+            "value": value,
+            "previous_value": previous,
+            "message": message,
+        }
+
+    def evaluate(self, changes: List[dict]) -> List[dict]:
+        """Firings of the metric rules for a batch of score changes"""
+        firings = []
+        for change in changes:
+            wallet = change["wallet_address"]
+            metrics = self.watched.get(wallet)
+            if metrics is None:
+                continue
+            if change.get("deleted"):
+                self.values.pop(wallet, None)
+                continue
+            previous = self.values.get(wallet)
+            if previous is None:
+                # First time this wallet is seen, only record a baseline
+                self.values[wallet] = {metric: change[metric] for metric in metrics}
+                continue
+            for metric, (below, above) in metrics.items():
+                value, old = change[metric], previous.get(metric)
+                previous[metric] = value
+                if old is None or value == old:
+                    continue
+                if below and value < old:
+                    # thresholds t with value < t <= old
+                    lo = bisect.bisect_right(below, (value, float("inf")))
+                    hi = bisect.bisect_right(below, (old, float("inf")))
+                    for threshold, rule_id in below[lo:hi]:
+                        firings.append(self._firing(
+                            rule_id, wallet, metric, value, old,
+                            f"{wallet} {metric} dropped below {threshold:g} (now {value:g})"
+                        ))
+                if above and value > old:
+                    # thresholds t with old <= t < value
+                    lo = bisect.bisect_left(above, (old, -1))
+                    hi = bisect.bisect_left(above, (value, -1))
+                    for threshold, rule_id in above[lo:hi]:
+                        firings.append(self._firing(
+                            rule_id, wallet, metric, value, old,
+                            f"{wallet} {metric} rose above {threshold:g} (now {value:g})"
+                        ))
+        return firings
+
+    def evaluate_ranking(self, ranking: List[str]) -> List[dict]:
+        """Firings of the top-N rules for a new total_score ranking"""
+        firings = []
+        previous = self.ranking
+        for top_n, rule_ids in self.top_rules.items():
+            before = set(previous[:top_n])
+            for position, wallet in enumerate(ranking[:top_n], start=1):
+                if wallet in before:
+                    continue
+                for rule_id in rule_ids:
+                    firings.append(self._firing(
+                        rule_id, wallet, "total_score", float(position), None,
+                        f"{wallet} entered the top {top_n} by total_score at #{position}"
+                    ))
+        self.ranking = ranking
+        return firings
+
+
+class AlertEngine:
+    """AlertIndex kept in sync with alert_rules and fed by score changes"""
+
+    def __init__(self):
+        self.index = AlertIndex()
+        # alert_rules version the index was built from; None until the
+        # first refresh builds it
+        self.version = None
+        self.fired = 0
+
+    async def _load_baselines(self, conn, wallets: List[str]):
+        if not wallets:
+            return
+        rows = (await conn.execute(text(BASELINE_QUERY), {"wallets": wallets})).mappings().all()
+        for row in rows:
+            self.index.set_baseline(row["wallet_address"], {metric: row[metric] for metric in ALERT_METRICS})
+
+    async def _load_ranking(self, conn):
+        if self.index.max_top_n:
+            self.index.ranking = (await conn.execute(
+                text(RANKING_QUERY), {"limit": self.index.max_top_n}
+            )).scalars().all()
+
+    async def _advance_version(self, conn, delta: int):
+        """Record a rule created (+1) or deleted (-1) by this worker.
+
+        The next refresh then skips the reload. If another worker changed
+        alert_rules in between, the count is off and the version stays
+        stale, so the refresh still reloads.
+        """
+        version = tuple((await conn.execute(text(RULES_VERSION_QUERY))).one())
+        if version[0] == self.version[0] + delta:
+            self.version = version
+
+    async def load(self):
+        """Build the index from alert_rules with current metrics as baseline"""
+        index = AlertIndex()
+        async with engine.connect() as conn:
+            self.version = tuple((await conn.execute(text(RULES_VERSION_QUERY))).one())
+            rows = (await conn.execute(text(LOAD_RULES_QUERY))).mappings().all()
+            for row in rows:
+                index.add(dict(row))
+            self.index = index
+            await self._load_baselines(conn, index.wallets())
+            await self._load_ranking(conn)
+        logger.info(f"Loaded {len(index.rules)} alert rules")
+
+    async def create_rule(self, rule: dict) -> dict:
+        validate_rule(rule)
+        params = {key: rule.get(key) for key in ("user_id", "kind", "wallet_address", "metric", "threshold", "top_n")}
+        async with engine.connect() as conn:
+            row = dict((await conn.execute(text(INSERT_RULE_QUERY), params)).mappings().one())
+            await conn.commit()
+            if self.version is None:
+                return row
+            self.index.add(row)
+            if row["wallet_address"] and row["wallet_address"] not in self.index.values:
+                await self._load_baselines(conn, [row["wallet_address"]])
+            if row["kind"] == "enters_top" and len(self.index.ranking) < row["top_n"]:
+                await self._load_ranking(conn)
+            await self._advance_version(conn, 1)
+        return row
+
+    async def delete_rule(self, user_id: str, rule_id: int) -> bool:
+        async with engine.connect() as conn:
+            deleted = (await conn.execute(
+                text("DELETE FROM alert_rules WHERE id = :id AND user_id = :user_id RETURNING id"),
+                {"id": rule_id, "user_id": user_id}
+            )).scalar()
+            await conn.commit()
+            if deleted is None:
+                return False
+            if self.version is not None:
+                self.index.remove(rule_id)
+                await self._advance_version(conn, -1)
+        return True
+
+    async def on_changes(self, changes: List[dict]):
+        """Score change listener: evaluate rules and store firings.
+
+        Rules created or deleted through another worker are picked up by
+        reloading the index when alert_rules changed.
+        """
+        async with engine.connect() as conn:
+            version = tuple((await conn.execute(text(RULES_VERSION_QUERY))).one())
+        if version != self.version:
+            # Keep the pre-refresh values and ranking so this batch's
+            # crossings and entries still fire. A ranking shorter than the
+            # reloaded one would make every wallet past its end an entry.
+            previous = self.index.values
+            previous_ranking = self.index.ranking
+            await self.load()
+            self.index.values.update(
+                {wallet: values for wallet, values in previous.items() if wallet in self.index.watched}
+            )
+            if len(previous_ranking) >= len(self.index.ranking):
+                self.index.ranking = previous_ranking
+        firings = self.index.evaluate(changes)
+        async with engine.connect() as conn:
+            if self.index.top_rules:
+                ranking = (await conn.execute(
+                    text(RANKING_QUERY), {"limit": self.index.max_top_n}
+                )).scalars().all()
+                firings.extend(self.index.evaluate_ranking(ranking))
+            if firings:
+                columns = {key: [firing[key] for firing in firings] for key in firings[0]}
+                await conn.execute(text(INSERT_EVENTS_QUERY), columns)
+                await conn.commit()
+        if firings:
+            self.fired += len(firings)
+            logger.info(f"Fired {len(firings)} alerts")
+
+
+async def fetch_rules(user_id: str) -> List[dict]:
+    """A user's rules from alert_rules, oldest first"""
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text(USER_RULES_QUERY), {"user_id": user_id})).mappings().all()
+    return [dict(row) for row in rows]
+
+
+async def fetch_alerts(user_id: str, limit: int, before_id: Optional[int] = None) -> List[dict]:
+    """A user's firings newest first, keyset paged on id"""
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text("""
+            SELECT id, rule_id, wallet_address, metric, value, previous_value, message, fired_at
+            FROM alert_events
+            WHERE user_id = :user_id
+            AND (CAST(:before_id AS BIGINT) IS NULL OR id < :before_id)
+            ORDER BY id DESC
+            LIMIT :limit
+        """), {"user_id": user_id, "before_id": before_id, "limit": limit})).mappings().all()
+    return [dict(row) for row in rows]
+
+
+alert_engine = AlertEngine()
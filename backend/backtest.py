@@ -0,0 +1,281 @@
+"""Copy-trade backtester.
+
+Replays a followed wallet's executed trades through copy-trade settings:
+every buy opens a lot of ``min(notional, max_trade_size)`` at the buy
+price, and the lot closes at the first later price of the same token that
+hits the stop loss or take profit, else when the wallet sells that token,
+else it is marked at the token's last price. Prices are the wallet's own
+trade prices, so exits fill at the observed price that crossed the level.
+
+Lots are laid out as (lot, later trade) pairs once; each stop-loss /
+take-profit combination is then a few vectorized passes over the pairs,
+so a grid sweep reuses the expensive part. Sweeps over many wallets run
+on a process pool.
+
+    python backtest.py --wallets w1,w2 --stop-loss 5,10,20 --take-profit 10,25,50 --workers 4
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+from database import engine
+from risk import DAYS_PER_YEAR, group_starts, grouped_risk_metrics
+
+DEFAULT_BACKTEST_CAPITAL = float(os.getenv("DEFAULT_BACKTEST_CAPITAL", "10000"))
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+BACKTEST_CHUNK_WALLETS = int(os.getenv("BACKTEST_CHUNK_WALLETS", "50"))
+
+EXIT_REASONS = ("stop_loss", "take_profit", "wallet_sell", "open")
+
+BACKTEST_TRADES_QUERY = """
+SELECT
+    wallet_address,
+    token_address,
+    EXTRACT(EPOCH FROM created_at)::float8 as ts,
+    price_usd::float8 as price,
+    (price_usd * amount)::float8 as notional,
+    trade_type = 'sell' as is_sell
+FROM trades
+WHERE wallet_address = ANY(CAST(:wallets AS TEXT[]))
+AND status = 'executed'
+AND price_usd > 0
+AND amount > 0
+ORDER BY wallet_address, token_address, created_at, id
+"""
+
+
+async def load_trades(wallets: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Executed trades of the wallets as column arrays, sorted by (wallet, token, time)"""
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text(BACKTEST_TRADES_QUERY), {"wallets": list(wallets)})).all()
+    count = len(rows)
+    return {
+        "wallet": np.array([row[0] for row in rows], dtype=object),
+        "token": np.array([row[1] or "" for row in rows], dtype=object),
+        "ts": np.fromiter((row[2] for row in rows), dtype=np.float64, count=count),
+        "price": np.fromiter((row[3] for row in rows), dtype=np.float64, count=count),
+        "notional": np.fromiter((row[4] for row in rows), dtype=np.float64, count=count),
+        "is_sell": np.fromiter((row[5] for row in rows), dtype=bool, count=count),
+    }
+
+
+class LotPairs:
+    """Every copied buy paired with the trades it can exit on"""
+
+    def __init__(self, trades: Dict[str, np.ndarray]):
+        wallet, token = trades["wallet"], trades["token"]
+        price, is_sell = trades["price"], trades["is_sell"]
+        n = len(price)
+        self.trades = trades
+
+        if n:
+            changed = np.concatenate(([True], (wallet[1:] != wallet[:-1]) | (token[1:] != token[:-1])))
+        else:
+            changed = np.zeros(0, dtype=bool)
+        starts = np.flatnonzero(changed)
+        ends = np.append(starts[1:], n) - 1 if n else starts
+        group_end = np.repeat(ends, np.diff(np.append(starts, n)))
+
+        # Next sell strictly after each trade: reverse running min of sell
+        # indexes, shifted by one; past the group end means none
+        sell_index = np.where(is_sell, np.arange(n), n)
+        next_sell = np.append(np.minimum.accumulate(sell_index[::-1])[::-1][1:], n) if n else sell_index
+        has_sell = next_sell <= group_end
+        window_end = np.where(has_sell, next_sell, group_end)
+
+        self.lots = np.flatnonzero(~is_sell)
+        self.lot_window_end = window_end[self.lots]
+        self.lot_ends_on_sell = has_sell[self.lots]
+        lengths = self.lot_window_end - self.lots
+        self.lengths = lengths
+
+        # Pair k of lot i is trade i + 1 + k, for k < lengths[i]
+        total = int(lengths.sum())
+        self.pair_lot = np.repeat(np.arange(len(self.lots)), lengths)
+        offsets = np.cumsum(lengths) - lengths
+        self.pair_trade = self.lots[self.pair_lot] + 1 + (np.arange(total) - offsets[self.pair_lot])
+        self.pair_return = price[self.pair_trade] / price[self.lots][self.pair_lot] - 1
+        self.segment_starts = offsets[lengths > 0]
+        self.has_pairs = lengths > 0
+
+    def simulate(
+        self,
+        max_trade_size: float,
+        stop_loss: Optional[float],
+        take_profit: Optional[float],
+        capital: float = DEFAULT_BACKTEST_CAPITAL,
+        equity_curve: bool = False,
+    ) -> List[dict]:
+        """Per-wallet results for one setting; percentages as in copy_trade_setups"""
+        trades = self.trades
+        lots = self.lots
+        total = len(self.pair_return)
+
+        hit = np.zeros(total, dtype=bool)
+        if stop_loss:
+            hit |= self.pair_return <= -stop_loss / 100
+        if take_profit:
+            hit |= self.pair_return >= take_profit / 100
+
+        # First hit per lot, or the end of its window
+        exit_trade = self.lot_window_end.copy()
+        hit_lot = np.zeros(len(lots), dtype=bool)
+        if total:
+            candidate = np.where(hit, np.arange(total), total)
+            first = np.minimum.reduceat(candidate, self.segment_starts)
+            hit_lot[self.has_pairs] = first < total
+            exit_trade[hit_lot] = self.pair_trade[first[first < total]]
+
+        exit_return = trades["price"][exit_trade] / trades["price"][lots] - 1
+        size = np.minimum(trades["notional"][lots], max_trade_size)
+        pnl = size * exit_return
+        exit_ts = trades["ts"][exit_trade]
+
+        reason = np.full(len(lots), 3, dtype=np.int8)
+        reason[self.lot_ends_on_sell] = 2
+        reason[hit_lot & (exit_return < 0)] = 0
+        reason[hit_lot & (exit_return >= 0)] = 1
+
+        # Realized PnL in exit order per wallet
+        wallets = trades["wallet"][lots]
+        order = np.lexsort((exit_ts, wallets))
+        wallets, pnl, exit_ts, reason = wallets[order], pnl[order], exit_ts[order], reason[order]
+        if not len(wallets):
+            return []
+        starts = group_starts(wallets)
+        ends = np.append(starts[1:], len(wallets)) - 1
+        counts = ends - starts + 1
+        span_days = np.maximum((exit_ts[ends] - exit_ts[starts]) / 86400.0, 1.0)
+        risk = grouped_risk_metrics(
+            starts, pnl, np.full(len(starts), capital), counts / span_days * DAYS_PER_YEAR
+        )
+        total_pnl = np.add.reduceat(pnl, starts)
+        wins = np.add.reduceat((pnl > 0).astype(np.int64), starts)
+        closed = np.add.reduceat((reason != 3).astype(np.int64), starts)
+
+        results = []
+        for i, start in enumerate(starts):
+            end = ends[i] + 1
+            exits = np.bincount(reason[start:end], minlength=len(EXIT_REASONS))
+            result = {
+                "wallet_address": wallets[start],
+                "lots": int(counts[i]),
+                "closed": int(closed[i]),
+                "total_pnl": round(float(total_pnl[i]), 2),
+                "return_pct": round(float(total_pnl[i]) / capital * 100, 4),
+                "hit_rate": round(float(wins[i]) / counts[i] * 100, 2),
+                "max_drawdown": round(float(risk["max_drawdown"][i]), 2),
+                "sharpe_ratio": round(float(risk["sharpe_ratio"][i]), 4),
+                "exits": dict(zip(EXIT_REASONS, map(int, exits))),
+            }
+            if equity_curve:
+                equity = capital + np.cumsum(pnl[start:end])
+                result["equity_curve"] = [
+                    {"time": datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None), "equity": round(float(value), 2)}
+                    for ts, value in zip(exit_ts[start:end], equity)
+                ]
+            results.append(result)
+        return results
+
+
+async def backtest_wallet(
+    wallet_address: str,
+    max_trade_size: float,
+    stop_loss: Optional[float],
+    take_profit: Optional[float],
+    capital: float = DEFAULT_BACKTEST_CAPITAL,
+) -> Optional[dict]:
+    """Backtest one wallet with its equity curve; None if it has no buys"""
+    pairs = LotPairs(await load_trades([wallet_address]))
+    results = pairs.simulate(max_trade_size, stop_loss, take_profit, capital, equity_curve=True)
+    return results[0] if results else None
+
+
+def sweep_chunk(
+    trades: Dict[str, np.ndarray],
+    max_trade_size: float,
+    stop_losses: Sequence[float],
+    take_profits: Sequence[float],
+    capital: float,
+) -> List[dict]:
+    """Grid results for a chunk of wallets; runs in a pool worker"""
+    pairs = LotPairs(trades)
+    results = []
+    for stop_loss, take_profit in itertools.product(stop_losses, take_profits):
+        for result in pairs.simulate(max_trade_size, stop_loss, take_profit, capital):
+            result["stop_loss"] = stop_loss
+            result["take_profit"] = take_profit
+            results.append(result)
+    return results
+
+
+async def sweep(
+    wallets: Sequence[str],
+    stop_losses: Sequence[float],
+    take_profits: Sequence[float],
+    max_trade_size: float,
+    capital: float = DEFAULT_BACKTEST_CAPITAL,
+    workers: Optional[int] = None,
+    chunk_wallets: Optional[int] = None,
+) -> List[dict]:
+    """Best stop-loss / take-profit per wallet by total PnL, over a grid.
+
+    Trades are loaded per chunk of wallets and each chunk's grid runs in a
+    separate process.
+    """
+    chunk_wallets = chunk_wallets or BACKTEST_CHUNK_WALLETS
+    loop = asyncio.get_running_loop()
+    chunks = [wallets[i:i + chunk_wallets] for i in range(0, len(wallets), chunk_wallets)]
+    with ProcessPoolExecutor(max_workers=workers or BACKTEST_WORKERS) as pool:
+        futures = []
+        for chunk in chunks:
+            trades = await load_trades(chunk)
+            futures.append(loop.run_in_executor(
+                pool, sweep_chunk, trades, max_trade_size, list(stop_losses), list(take_profits), capital
+            ))
+        results = [result for chunk_results in await asyncio.gather(*futures) for result in chunk_results]
+
+    best: Dict[str, dict] = {}
+    for result in results:
+        current = best.get(result["wallet_address"])
+        if current is None or result["total_pnl"] > current["total_pnl"]:
+            best[result["wallet_address"]] = result
+    return sorted(best.values(), key=lambda result: result["total_pnl"], reverse=True)
+
+
+def _floats(value: str) -> List[float]:
+    return [float(part) for part in value.split(",") if part]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallets", help="comma separated; default every wallet with trades")
+    parser.add_argument("--stop-loss", type=_floats, default=[5, 10, 20])
+    parser.add_argument("--take-profit", type=_floats, default=[10, 20, 50])
+    parser.add_argument("--max-trade-size", type=float, default=500)
+    parser.add_argument("--capital", type=float, default=DEFAULT_BACKTEST_CAPITAL)
+    parser.add_argument("--workers", type=int, default=BACKTEST_WORKERS)
+    args = parser.parse_args()
+
+    if args.wallets:
+        wallets = args.wallets.split(",")
+    else:
+        async with engine.connect() as conn:
+            wallets = (await conn.execute(
+                text("SELECT DISTINCT wallet_address FROM trades ORDER BY 1")
+            )).scalars().all()
+    ranked = await sweep(wallets, args.stop_loss, args.take_profit, args.max_trade_size, args.capital, args.workers)
+    await engine.dispose()
+    print(json.dumps(ranked, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""Alert evaluation cost: indexed incremental evaluation vs scanning every rule.
+
+    python benchmarks/bench_alerts.py --rules 100000 --wallets 200000 --watched 10000 --changed 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerts import ALERT_METRICS, AlertIndex  # noqa: E402
+
+
+def synthetic_metrics(rng: random.Random) -> dict:
+    return {metric: rng.uniform(0, 100) for metric in ALERT_METRICS}
+
+
+def naive_evaluate(rules: list, values: dict, changes: list) -> int:
+    """Every rule checked against the changed wallets"""
+    changed = {change["wallet_address"]: change for change in changes}
+    fired = 0
+    for rule in rules:
+        change = changed.get(rule["wallet_address"])
+        if change is None:
+            continue
+        old, value = values[rule["wallet_address"]][rule["metric"]], change[rule["metric"]]
+        if rule["kind"] == "metric_below" and value < rule["threshold"] <= old:
+            fired += 1
+        elif rule["kind"] == "metric_above" and old <= rule["threshold"] < value:
+            fired += 1
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=100000)
+    parser.add_argument("--wallets", type=int, default=200000)
+    parser.add_argument("--watched", type=int, default=10000, help="wallets that rules are spread over")
+    parser.add_argument("--changed", type=int, default=10000)
+    parser.add_argument("--cycles", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    wallets = [f"wallet{i:07d}" for i in range(args.wallets)]
+    values = {wallet: synthetic_metrics(rng) for wallet in wallets}
+
+    rules = [{
+        "id": i,
+        "user_id": f"user{i % 5000}",
+        "kind": rng.choice(("metric_below", "metric_above")),
+        "wallet_address": wallets[rng.randrange(args.watched)],
+        "metric": rng.choice(ALERT_METRICS),
+        "threshold": rng.uniform(0, 100),
+    } for i in range(args.rules)]
+
+    index = AlertIndex()
+    start = time.perf_counter()
+    for rule in rules:
+        index.add(rule)
+    for wallet in index.wallets():
+        index.set_baseline(wallet, dict(values[wallet]))
+    print(f"indexed {args.rules} rules in {time.perf_counter() - start:.3f}s")
+
+    indexed_total = naive_total = 0.0
+    for cycle in range(args.cycles):
+        changes = []
+        for wallet in rng.sample(wallets, args.changed):
+            change = {metric: value + rng.gauss(0, 10) for metric, value in values[wallet].items()}
+            change["wallet_address"] = wallet
+            changes.append(change)
+
+        start = time.perf_counter()
+        naive_fired = naive_evaluate(rules, values, changes)
+        naive_total += time.perf_counter() - start
+
+        start = time.perf_counter()
+        fired = index.evaluate(changes)
+        indexed_total += time.perf_counter() - start
+
+        assert len(fired) == naive_fired, (len(fired), naive_fired)
+        for change in changes:
+            values[change["wallet_address"]] = {metric: change[metric] for metric in ALERT_METRICS}
+        print(f"cycle {cycle}: {len(fired)} firings")
+
+    print(f"scan all rules: {naive_total / args.cycles * 1000:.1f} ms/cycle")
+    print(f"indexed:        {indexed_total / args.cycles * 1000:.1f} ms/cycle")
+
+
+if __name__ == "__main__":
+    main()
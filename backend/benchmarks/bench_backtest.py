@@ -0,0 +1,72 @@
+"""Stop-loss / take-profit grid sweep on synthetic trades: one process vs a pool.
+
+    python benchmarks/bench_backtest.py --wallets 500 --trades-per-wallet 400 --workers 4
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import sweep_chunk  # noqa: E402
+
+STOP_LOSSES = [2, 5, 10, 20, 30]
+TAKE_PROFITS = [5, 10, 20, 50, 100]
+
+
+def synthetic_trades(wallets: range, per_wallet: int, tokens: int = 5, seed: int = 3) -> dict:
+    rng = np.random.default_rng(seed + wallets.start)
+    count = len(wallets) * per_wallet
+    wallet = np.repeat(np.array([f"wallet{i:06d}" for i in wallets], dtype=object), per_wallet)
+    token = np.array([f"TOK{i}" for i in range(tokens)], dtype=object)[rng.integers(0, tokens, count)]
+    ts = rng.uniform(0, 90 * 86400, count)
+    order = np.lexsort((ts, token, wallet))
+    # Random-walk prices per token
+    price = np.exp(rng.normal(0, 0.08, count).cumsum() % 3) + 0.1
+    return {
+        "wallet": wallet[order],
+        "token": token[order],
+        "ts": ts[order],
+        "price": price[order],
+        "notional": rng.uniform(50, 2000, count),
+        "is_sell": rng.random(count) < 0.3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wallets", type=int, default=500)
+    parser.add_argument("--trades-per-wallet", type=int, default=400)
+    parser.add_argument("--chunk", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    chunks = [
+        synthetic_trades(range(start, min(start + args.chunk, args.wallets)), args.trades_per_wallet)
+        for start in range(0, args.wallets, args.chunk)
+    ]
+    grid = len(list(itertools.product(STOP_LOSSES, TAKE_PROFITS)))
+    sweep_args = (500.0, STOP_LOSSES, TAKE_PROFITS, 10000.0)
+
+    start = time.perf_counter()
+    serial = [sweep_chunk(chunk, *sweep_args) for chunk in chunks]
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        pooled = list(pool.map(sweep_chunk, chunks, *[[arg] * len(chunks) for arg in sweep_args]))
+    pool_time = time.perf_counter() - start
+
+    assert [len(c) for c in serial] == [len(c) for c in pooled]
+    print(f"{args.wallets} wallets x {args.trades_per_wallet} trades, {grid} settings each")
+    print(f"one process:      {serial_time:.2f}s")
+    print(f"{args.workers} process pool: {pool_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Ingestion throughput against the local Cielo stub.
+
+    python benchmarks/bench_ingest.py --wallets 2000 --concurrency 50 --rate 500 --latency-ms 50
+    python benchmarks/bench_ingest.py --wallets 2000 --dry-run
+
+Without --dry-run the analysed wallets are upserted into DATABASE_URL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import engine  # noqa: E402
+from ingest import WalletIngestor  # noqa: E402
+from stub_cielo import start_stub  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallets", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=500, help="requests per second per host")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    runner, base_url = await start_stub(latency_ms=args.latency_ms, fail_every=args.fail_every)
+    try:
+        ingestor = WalletIngestor(
+            base_url=base_url,
+            concurrency=args.concurrency,
+            rate_per_host=args.rate,
+            batch_size=args.batch_size,
+            write=not args.dry_run,
+        )
+        report = await ingestor.run(f"benchwallet{i:07d}" for i in range(args.wallets))
+    finally:
+        await runner.cleanup()
+        await engine.dispose()
+
+    # Sequential fetches would take at least latency * wallets
+    report["sequential_floor_seconds"] = round(args.latency_ms / 1000 * args.wallets, 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
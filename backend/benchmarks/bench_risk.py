@@ -0,0 +1,70 @@
+"""Grouped NumPy risk metrics vs a per-wallet loop on synthetic trades.
+
+    python benchmarks/bench_risk.py --wallets 10000 --trades 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk import series_risk_metrics, trade_risk_metrics  # noqa: E402
+
+
+def synthetic_trades(wallets: int, trades: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    owner = np.sort(rng.integers(0, wallets, trades))
+    addresses = np.array([f"wallet{i:07d}" for i in range(wallets)], dtype=object)[owner]
+    ts = np.sort(rng.uniform(0, 90 * 86400, trades))
+    ts = ts[np.argsort(owner, kind="stable")]
+    # Half the trades are sells closing a position, the rest buys (NaN)
+    pnl = np.where(rng.random(trades) < 0.5, rng.normal(5, 250, trades), np.nan)
+    deployed = rng.uniform(0, 5000, trades)
+    return addresses, ts, pnl, deployed
+
+
+def per_wallet(addresses, ts, pnl, deployed) -> list:
+    results = []
+    start = 0
+    for end in range(1, len(addresses) + 1):
+        if end == len(addresses) or addresses[end] != addresses[start]:
+            span = max((ts[end - 1] - ts[start]) / 86400.0, 1.0)
+            closed = pnl[start:end][~np.isnan(pnl[start:end])]
+            results.append(series_risk_metrics(
+                list(closed), deployed[start:end].max(), len(closed) / span * 365
+            ))
+            start = end
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wallets", type=int, default=10000)
+    parser.add_argument("--trades", type=int, default=1000000)
+    args = parser.parse_args()
+
+    data = synthetic_trades(args.wallets, args.trades)
+
+    start = time.perf_counter()
+    grouped = trade_risk_metrics(*data)
+    grouped_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looped = per_wallet(*data)
+    loop_time = time.perf_counter() - start
+
+    mismatches = sum(
+        abs(row["max_drawdown"] - round(float(grouped["max_drawdown"][i]), 2)) > 1e-6
+        for i, row in enumerate(looped)
+    )
+    print(f"wallets={len(looped)} trades={args.trades}")
+    print(f"per-wallet loop: {loop_time:.3f}s")
+    print(f"grouped numpy:   {grouped_time:.3f}s ({loop_time / grouped_time:.1f}x)")
+    print(f"drawdown mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
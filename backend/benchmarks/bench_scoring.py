@@ -0,0 +1,120 @@
+"""Micro-benchmark: per-row calculate_wallet_scores vs the batch scorer.
+
+    python benchmarks/bench_scoring.py --rows 100000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import score_arrays, score_wallets  # noqa: E402
+
+
+def legacy_calculate_wallet_scores(row) -> dict:
+    """The original per-row scorer, kept here as the baseline"""
+    risk_metrics = json.loads(row['risk_metrics']) if row['risk_metrics'] and not pd.isna(row['risk_metrics']) else {}
+    token_metrics = json.loads(row['token_metrics']) if row['token_metrics'] and not pd.isna(row['token_metrics']) else []
+    roi_score = min(max(row['roi_percentage'] / 100, 0), 1) * 100 if pd.notna(row['roi_percentage']) else 0
+    consistency = float(row['consistency_score']) if pd.notna(row['consistency_score']) else 50.0
+    volume_score = min(row['total_volume'] / 100000, 1) * 100 if pd.notna(row['total_volume']) else 0
+    trade_score = min(row['total_trades'] / 200, 1) * 100 if pd.notna(row['total_trades']) else 0
+    total_score = (
+        roi_score * 0.3 +
+        consistency * 0.3 +
+        volume_score * 0.2 +
+        trade_score * 0.2
+    )
+    return {
+        "total_score": round(total_score, 2),
+        "roi_score": round(roi_score, 2),
+        "consistency_score": round(consistency, 2),
+        "volume_score": round(volume_score, 2),
+        "risk_score": round(100 - (risk_metrics.get('max_drawdown', 0) or 0), 2),
+        "risk_metrics": risk_metrics,
+        "token_stats": token_metrics
+    }
+
+
+def synthetic_rows(count: int, seed: int = 42) -> list:
+    rng = np.random.default_rng(seed)
+    roi = rng.normal(40, 80, count)
+    consistency = rng.uniform(0, 100, count)
+    volume = rng.lognormal(9, 2, count)
+    trades = rng.integers(0, 500, count)
+    drawdown = rng.uniform(0, 80, count)
+    rows = []
+    for i in range(count):
+        rows.append({
+            "wallet_address": f"wallet{i}",
+            "roi_percentage": None if i % 97 == 0 else float(roi[i]),
+            "consistency_score": None if i % 13 == 0 else float(consistency[i]),
+            "total_volume": float(volume[i]),
+            "total_trades": int(trades[i]),
+            "risk_metrics": json.dumps({"max_drawdown": float(drawdown[i]), "sharpe_ratio": 1.2, "risk_rating": "Medium"}),
+            "token_metrics": json.dumps([
+                {"symbol": "SOL", "roi": 12.5, "volume": 1000.0, "num_trades": 4, "profit": 125.0},
+                {"symbol": "BONK", "roi": -3.0, "volume": 250.0, "num_trades": 2, "profit": -7.5},
+            ]),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+
+    start = time.perf_counter()
+    legacy = [legacy_calculate_wallet_scores(row) for row in rows]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = score_wallets(rows)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score_wallets(rows, decode_tokens=False)
+    no_tokens_time = time.perf_counter() - start
+
+    decoded = [
+        {**row, "risk_metrics": json.loads(row["risk_metrics"]), "token_metrics": json.loads(row["token_metrics"])}
+        for row in rows
+    ]
+    start = time.perf_counter()
+    score_wallets(decoded)
+    decoded_time = time.perf_counter() - start
+
+    columns = [
+        np.array([np.nan if row[key] is None else row[key] for row in rows], dtype=np.float64)
+        for key in ("roi_percentage", "consistency_score", "total_volume", "total_trades")
+    ]
+    drawdown = np.array([row["risk_metrics"]["max_drawdown"] for row in decoded])
+    start = time.perf_counter()
+    score_arrays(*columns, drawdown)
+    arrays_time = time.perf_counter() - start
+
+    score_keys = ["total_score", "roi_score", "consistency_score", "volume_score", "risk_score"]
+    mismatches = sum(
+        1 for old, new in zip(legacy, batch)
+        if any(abs(old[key] - new[key]) > 0.011 for key in score_keys)
+    )
+
+    print(f"rows:                  {args.rows}")
+    print(f"per-row scorer:        {legacy_time:.3f}s")
+    print(f"batch scorer:          {batch_time:.3f}s ({legacy_time / batch_time:.1f}x)")
+    print(f"batch, tokens raw:     {no_tokens_time:.3f}s ({legacy_time / no_tokens_time:.1f}x)")
+    print(f"batch, driver-decoded: {decoded_time:.3f}s ({legacy_time / decoded_time:.1f}x)")
+    print(f"score_arrays only:     {arrays_time:.3f}s")
+    print(f"score mismatches:      {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
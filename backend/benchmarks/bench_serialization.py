@@ -0,0 +1,92 @@
+"""Serialization cost of a /wallets/top page: Pydantic + jsonable_encoder vs the orjson fast path.
+
+    python benchmarks/bench_serialization.py --wallets 100 --repeat 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import WalletScore, wallet_score_record  # noqa: E402
+from serialization import dumps  # noqa: E402
+
+
+def synthetic_rows(count: int) -> list:
+    tokens = json.dumps([
+        {"symbol": f"TOK{i}", "roi": 12.5 + i, "volume": 1000.0 * i, "num_trades": 4 + i, "profit": 125.0 - i}
+        for i in range(8)
+    ])
+    risk = json.dumps({"max_drawdown": 23.5, "sharpe_ratio": 1.4, "sortino_ratio": 1.9, "risk_rating": "Medium"})
+    return [{
+        "wallet_address": f"wallet{i:05d}",
+        "total_pnl_usd": 1234.5 + i,
+        "winrate": 61.2,
+        "total_trades": 120 + i,
+        "total_score": 77.3,
+        "roi_score": 80.0,
+        "consistency_score": 66.1,
+        "volume_score": 91.0,
+        "risk_score": 76.5,
+        "max_drawdown": 23.5,
+        "sharpe_ratio": 1.4,
+        "token_metrics": tokens,
+        "risk_metrics": risk,
+    } for i in range(count)]
+
+
+def pydantic_path(rows) -> bytes:
+    """The previous path: decode JSONB, validate a model per row, jsonable_encoder, json.dumps"""
+    wallets = []
+    for row in rows:
+        wallets.append(WalletScore(
+            address=row['wallet_address'],
+            trade_count=row['total_trades'],
+            win_rate=row['winrate'],
+            avg_profit=row['total_pnl_usd'] / row['total_trades'],
+            max_drawdown=row['max_drawdown'],
+            sharpe_ratio=row['sharpe_ratio'],
+            token_stats=json.loads(row['token_metrics']),
+            risk_metrics=json.loads(row['risk_metrics']),
+            total_score=row['total_score'],
+            roi_score=row['roi_score'],
+            consistency_score=row['consistency_score'],
+            volume_score=row['volume_score'],
+            risk_score=row['risk_score'],
+        ))
+    return json.dumps(jsonable_encoder(wallets), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows) -> bytes:
+    return dumps([wallet_score_record(row) for row in rows])
+
+
+def timed(fn, rows, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wallets", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.wallets)
+    assert json.loads(pydantic_path(rows)) == json.loads(fast_path(rows)), "paths disagree"
+
+    slow = timed(pydantic_path, rows, args.repeat)
+    fast = timed(fast_path, rows, args.repeat)
+    print(f"wallets per response:        {args.wallets}")
+    print(f"pydantic + jsonable_encoder: {slow * 1000:8.3f} ms")
+    print(f"orjson fast path:            {fast * 1000:8.3f} ms ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
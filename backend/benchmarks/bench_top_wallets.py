@@ -0,0 +1,100 @@
+"""/wallets/top query latency: static filter SQL vs only the active predicates.
+
+Runs against the configured database; load it with generate_dataset.py
+and let the scores refresh first. Run once before and once after the
+index migrations to see what each change contributes:
+
+    python benchmarks/bench_top_wallets.py --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import top_wallets_query  # noqa: E402
+from database import engine  # noqa: E402
+
+# The query before the filters were built per request
+STATIC_QUERY = """
+SELECT
+    ws.wallet_address, ws.total_pnl_usd, ws.winrate, ws.total_trades, ws.total_score,
+    ws.roi_score, ws.consistency_score, ws.volume_score, ws.risk_score, ws.max_drawdown,
+    ws.sharpe_ratio,
+    COALESCE(wa.token_metrics, '[]'::jsonb)::text as token_metrics,
+    COALESCE(wa.risk_metrics, '{}'::jsonb)::text as risk_metrics
+FROM wallet_scores ws
+JOIN wallet_analysis wa ON wa.wallet_address = ws.wallet_address
+WHERE ws.roi_percentage >= :min_roi
+AND ws.winrate >= :min_win_rate
+AND ws.total_trades >= :min_trades
+AND ws.total_volume >= :min_volume
+AND ws.total_pnl_usd >= :min_profit
+AND (CAST(:risk_level AS TEXT) IS NULL OR ws.risk_rating = :risk_level)
+ORDER BY ws.total_score DESC, ws.wallet_address
+LIMIT :limit
+"""
+
+CASES = {
+    "default": {},
+    "dashboard": {"min_roi": 20.0, "min_win_rate": 50.0, "min_trades": 20},
+    "risk_low": {"risk_level": "Low"},
+    "selective": {"min_trades": 70, "min_volume": 100000.0},
+    "very_selective": {"min_roi": 300.0, "min_win_rate": 90.0, "risk_level": "High"},
+}
+
+
+def static_params(filters: dict, limit: int) -> dict:
+    params = {"min_roi": 0.0, "min_win_rate": 0.0, "min_trades": 0, "min_volume": 0.0, "min_profit": 0.0, "risk_level": None}
+    params.update(filters)
+    params["limit"] = limit
+    return params
+
+
+def dynamic_filters(filters: dict) -> dict:
+    filters = dict(filters)
+    if filters.get("risk_level"):
+        filters["risk_level"] = filters["risk_level"].lower()
+    return filters
+
+
+async def timed_runs(conn, query: str, params: dict, repeat: int):
+    # Past the first few executions asyncpg's prepared statement may switch
+    # to a generic plan, so every run is kept
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = (await conn.execute(text(query), params)).all()
+        times.append(time.perf_counter() - start)
+    return len(rows), statistics.median(times) * 1000, max(times) * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    async with engine.connect() as conn:
+        total = (await conn.execute(text("SELECT COUNT(*) FROM wallet_scores"))).scalar()
+        print(f"wallet_scores rows: {total}")
+        for name, filters in CASES.items():
+            count, static_median, static_max = await timed_runs(
+                conn, STATIC_QUERY, static_params(filters, args.limit), args.repeat
+            )
+            query, params = top_wallets_query(dynamic_filters(filters), args.limit)
+            _, dynamic_median, dynamic_max = await timed_runs(conn, query, params, args.repeat)
+            print(
+                f"{name:<15} rows={count:<4} static median={static_median:8.2f}ms max={static_max:8.2f}ms   "
+                f"active-only median={dynamic_median:8.2f}ms max={dynamic_max:8.2f}ms"
+            )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
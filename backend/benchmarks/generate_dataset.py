@@ -0,0 +1,237 @@
+"""Synthetic wallet_analysis, trades and copy_trade_setups at scale.
+
+Loads Postgres with COPY in chunks, so 10M wallets fit in bounded memory:
+
+    python benchmarks/generate_dataset.py --wallets 100000 --trades-per-wallet 20
+    python benchmarks/generate_dataset.py --wallets 10000000 --trades-per-wallet 2 --reset
+
+or writes the same tables to a SQLite file for tools that only need the
+data (the API itself needs Postgres):
+
+    python benchmarks/generate_dataset.py --wallets 10000 --sqlite /tmp/wallets.db
+
+Postgres runs the migrations first. Token popularity follows a Zipf law
+and ROI has fat tails, so filters and token lookups are as selective as
+on real data.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import asyncpg
+import numpy as np
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DATABASE_URL  # noqa: E402
+from migrate import _driver_dsn, run_migrations  # noqa: E402
+
+BASE58 = np.array(list("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"))
+ADDRESS_LENGTH = 44
+TOP_SYMBOLS = [
+    "SOL", "BONK", "WIF", "JUP", "PYTH", "RAY", "ORCA", "MEW", "POPCAT", "JTO",
+    "BOME", "SLERF", "MYRO", "SAMO", "WEN", "TNSR", "KMNO", "DRIFT", "ZEUS", "PONKE",
+]
+SYMBOLS = np.array(TOP_SYMBOLS + [f"TKN{i:04d}" for i in range(2000 - len(TOP_SYMBOLS))])
+HISTORY_DAYS = 90
+
+WALLET_COLUMNS = [
+    "wallet_address", "total_pnl_usd", "winrate", "total_trades", "roi_percentage",
+    "avg_trade_size", "total_volume", "consistency_score", "token_metrics",
+    "risk_metrics", "last_updated",
+]
+TRADE_COLUMNS = ["wallet_address", "token_address", "trade_type", "status", "price_usd", "amount", "created_at"]
+SETUP_COLUMNS = ["wallet_address", "active", "max_trade_size", "stop_loss", "take_profit", "notes", "updated_at"]
+
+# The per-statement wallet_daily_pnl trigger is disabled during the bulk
+# load and the rollup rebuilt once at the end, as in its migration
+REBUILD_DAILY_PNL = """
+TRUNCATE wallet_daily_pnl;
+INSERT INTO wallet_daily_pnl (wallet_address, day, trades, successful, daily_pnl)
+SELECT
+    wallet_address,
+    DATE_TRUNC('day', created_at),
+    COUNT(*),
+    SUM(CASE WHEN status = 'executed' THEN 1 ELSE 0 END),
+    COALESCE(SUM(CASE
+        WHEN trade_type = 'sell' AND status = 'executed'
+        THEN price_usd * amount
+        ELSE -price_usd * amount
+        END), 0)
+FROM trades
+WHERE wallet_address IS NOT NULL AND created_at IS NOT NULL
+GROUP BY 1, 2;
+"""
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallet_analysis (
+    wallet_address TEXT PRIMARY KEY, total_pnl_usd REAL, winrate REAL, total_trades INTEGER,
+    roi_percentage REAL, avg_trade_size REAL, total_volume REAL, consistency_score REAL,
+    token_metrics TEXT, risk_metrics TEXT, last_updated TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY, wallet_address TEXT, token_address TEXT, trade_type TEXT,
+    status TEXT, price_usd REAL, amount REAL, created_at TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS copy_trade_setups (
+    wallet_address TEXT PRIMARY KEY, active INTEGER, max_trade_size REAL, stop_loss REAL,
+    take_profit REAL, notes TEXT, updated_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_trades_wallet_created ON trades (wallet_address, created_at);
+"""
+
+
+def addresses(rng: np.random.Generator, count: int) -> np.ndarray:
+    chars = BASE58[rng.integers(0, len(BASE58), (count, ADDRESS_LENGTH))]
+    return chars.view(f"<U{ADDRESS_LENGTH}").ravel()
+
+
+def generate_chunk(rng: np.random.Generator, count: int, trades_per_wallet: float, setup_fraction: float, now: datetime):
+    """One chunk of rows for the three tables, as lists of tuples"""
+    wallets = addresses(rng, count)
+    popularity = 1.0 / np.arange(1, len(SYMBOLS) + 1) ** 1.1
+    popularity /= popularity.sum()
+
+    token_counts = np.minimum(1 + rng.poisson(4, count), 20)
+    total = int(token_counts.sum())
+    owner = np.repeat(np.arange(count), token_counts)
+    symbols = SYMBOLS[rng.choice(len(SYMBOLS), total, p=popularity)]
+    token_roi = np.round(rng.standard_t(3, total) * 60 + 15, 2)
+    token_volume = np.round(rng.lognormal(7.5, 1.6, total), 2)
+    token_trades = 1 + rng.poisson(6, total)
+    token_profit = np.round(token_volume * token_roi / 200, 2)
+
+    volume = np.bincount(owner, token_volume, count)
+    trades = np.bincount(owner, token_trades, count).astype(np.int64)
+    profit = np.bincount(owner, token_profit, count)
+    roi = np.round(np.clip(rng.standard_t(3, count) * 40 + 12, -100, 5000), 2)
+    winrate = np.round(rng.beta(2.2, 2.0, count) * 100, 2)
+    consistency = np.round(rng.beta(2.0, 2.0, count) * 100, 2)
+    drawdown = np.round(rng.beta(1.6, 4.0, count) * 100, 2)
+    sharpe = np.round(rng.normal(1.0, 1.2, count), 4)
+    sortino = np.round(sharpe * rng.uniform(1.0, 1.8, count), 4)
+    updated = now - (rng.uniform(0, HISTORY_DAYS * 86400, count) * 1e6).astype("timedelta64[us]").astype(timedelta)
+
+    starts = np.concatenate(([0], np.cumsum(token_counts)[:-1]))
+    wallet_rows = []
+    for i in range(count):
+        lo, hi = starts[i], starts[i] + token_counts[i]
+        tokens = [
+            {"symbol": symbols[j], "roi": float(token_roi[j]), "volume": float(token_volume[j]),
+             "num_trades": int(token_trades[j]), "profit": float(token_profit[j])}
+            for j in range(lo, hi)
+        ]
+        rating = "Low" if drawdown[i] < 20 else "Medium" if drawdown[i] < 50 else "High"
+        risk = {"max_drawdown": float(drawdown[i]), "sharpe_ratio": float(sharpe[i]),
+                "sortino_ratio": float(sortino[i]), "risk_rating": rating}
+        wallet_rows.append((
+            str(wallets[i]), float(profit[i]), float(winrate[i]), int(trades[i]), float(roi[i]),
+            float(volume[i] / trades[i]), float(volume[i]), float(consistency[i]),
+            orjson.dumps(tokens).decode(), orjson.dumps(risk).decode(), updated[i],
+        ))
+
+    trade_rows = []
+    if trades_per_wallet > 0:
+        per_wallet = rng.poisson(trades_per_wallet, count)
+        n = int(per_wallet.sum())
+        trade_owner = np.repeat(np.arange(count), per_wallet)
+        # Trade a token the wallet holds
+        token_index = starts[trade_owner] + (rng.random(n) * token_counts[trade_owner]).astype(np.int64)
+        sells = rng.random(n) < 0.5
+        executed = rng.random(n) < 0.85
+        price = np.round(rng.lognormal(0, 1.5, n), 6)
+        amount = np.round(rng.lognormal(4, 1.2, n), 4)
+        created = now - (rng.uniform(0, HISTORY_DAYS * 86400, n) * 1e6).astype("timedelta64[us]").astype(timedelta)
+        trade_rows = [
+            (str(wallets[trade_owner[k]]), str(symbols[token_index[k]]), "sell" if sells[k] else "buy",
+             "executed" if executed[k] else "failed", float(price[k]), float(amount[k]), created[k])
+            for k in range(n)
+        ]
+
+    setup_rows = []
+    chosen = np.flatnonzero(rng.random(count) < setup_fraction)
+    for i in chosen:
+        setup_rows.append((
+            str(wallets[i]), bool(rng.random() < 0.6), float(rng.choice([100, 250, 500, 1000])),
+            float(rng.choice([5, 10, 15, 20])), float(rng.choice([10, 20, 50, 100])), "", now,
+        ))
+    return wallet_rows, trade_rows, setup_rows
+
+
+async def load_postgres(args, chunks):
+    await run_migrations()
+    conn = await asyncpg.connect(_driver_dsn(DATABASE_URL))
+    try:
+        if args.reset:
+            await conn.execute(
+                "TRUNCATE wallet_analysis, trades, copy_trade_setups, wallet_scores, wallet_daily_pnl,"
+                " wallet_stats_daily, wallet_token_stats"
+            )
+        await conn.execute("ALTER TABLE trades DISABLE TRIGGER USER")
+        for wallet_rows, trade_rows, setup_rows in chunks:
+            async with conn.transaction():
+                await conn.copy_records_to_table("wallet_analysis", records=wallet_rows, columns=WALLET_COLUMNS)
+                if trade_rows:
+                    await conn.copy_records_to_table("trades", records=trade_rows, columns=TRADE_COLUMNS)
+                if setup_rows:
+                    await conn.copy_records_to_table("copy_trade_setups", records=setup_rows, columns=SETUP_COLUMNS)
+            yield len(wallet_rows), len(trade_rows)
+        await conn.execute(REBUILD_DAILY_PNL)
+        await conn.execute("ANALYZE wallet_analysis; ANALYZE trades; ANALYZE copy_trade_setups; ANALYZE wallet_daily_pnl")
+    finally:
+        await conn.execute("ALTER TABLE trades ENABLE TRIGGER USER")
+        await conn.close()
+
+
+async def load_sqlite(args, chunks):
+    db = sqlite3.connect(args.sqlite)
+    try:
+        db.executescript(SQLITE_SCHEMA)
+        if args.reset:
+            db.executescript("DELETE FROM wallet_analysis; DELETE FROM trades; DELETE FROM copy_trade_setups;")
+        for wallet_rows, trade_rows, setup_rows in chunks:
+            db.executemany(f"INSERT INTO wallet_analysis ({', '.join(WALLET_COLUMNS)}) VALUES ({', '.join('?' * len(WALLET_COLUMNS))})", wallet_rows)
+            db.executemany(f"INSERT INTO trades ({', '.join(TRADE_COLUMNS)}) VALUES ({', '.join('?' * len(TRADE_COLUMNS))})", trade_rows)
+            db.executemany(f"INSERT INTO copy_trade_setups ({', '.join(SETUP_COLUMNS)}) VALUES ({', '.join('?' * len(SETUP_COLUMNS))})", setup_rows)
+            db.commit()
+            yield len(wallet_rows), len(trade_rows)
+    finally:
+        db.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallets", type=int, default=10000)
+    parser.add_argument("--trades-per-wallet", type=float, default=20, help="mean trades per wallet")
+    parser.add_argument("--setup-fraction", type=float, default=0.02, help="share of wallets with a copy trade setup")
+    parser.add_argument("--chunk", type=int, default=50000, help="wallets generated and loaded at a time")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sqlite", help="write to this SQLite file instead of DATABASE_URL")
+    parser.add_argument("--reset", action="store_true", help="empty the tables first")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    chunks = (
+        generate_chunk(rng, min(args.chunk, args.wallets - start), args.trades_per_wallet, args.setup_fraction, now)
+        for start in range(0, args.wallets, args.chunk)
+    )
+    loader = load_sqlite if args.sqlite else load_postgres
+
+    start = time.perf_counter()
+    wallets = trades = 0
+    async for chunk_wallets, chunk_trades in loader(args, chunks):
+        wallets += chunk_wallets
+        trades += chunk_trades
+        elapsed = time.perf_counter() - start
+        print(f"{wallets:>10} wallets {trades:>12} trades  {wallets / elapsed:8.0f} wallets/s", flush=True)
+    print(f"done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""Closed-loop HTTP load driver shared by the API benchmarks.
+
+``concurrency`` workers each send one request at a time until the
+deadline. A worker gets its requests from ``make_picker(seed)``, a
+callable returning (endpoint name, path); latencies and errors are kept
+per endpoint name.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+import aiohttp
+
+Picker = Callable[[], Tuple[str, str]]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values, in milliseconds"""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1000
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+async def worker(session, base_url, pick: Picker, deadline, error_status, latencies, errors):
+    while time.perf_counter() < deadline:
+        endpoint, path = pick()
+        start = time.perf_counter()
+        try:
+            async with session.get(base_url + path) as resp:
+                await resp.read()
+                if resp.status >= error_status:
+                    errors[endpoint] += 1
+        except aiohttp.ClientError:
+            errors[endpoint] += 1
+        latencies[endpoint].append(time.perf_counter() - start)
+
+
+async def run_level(
+    base_url: str,
+    make_picker: Callable[[int], Picker],
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+    error_status: int = 400,
+) -> dict:
+    """Drive the server for duration seconds; overall and per-endpoint stats"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[
+            worker(session, base_url, make_picker(seed + i), deadline, error_status, latencies, errors)
+            for i in range(concurrency)
+        ])
+
+    endpoints = {name: summarize(values, errors[name], duration) for name, values in latencies.items()}
+    overall = summarize(
+        [value for values in latencies.values() for value in values], sum(errors.values()), duration
+    )
+    return {"concurrency": concurrency, "overall": overall, "endpoints": endpoints}
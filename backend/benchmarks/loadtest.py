@@ -0,0 +1,178 @@
+"""Load test of the read API at controlled concurrency.
+
+Drives a weighted mix of /wallets/top, /wallets, /wallet/{address},
+/analytics/{address} and /stats/overview against a running server,
+reports p50/p95/p99 and RPS per endpoint and concurrency level, and saves
+the results as JSON so runs can be compared:
+
+    python benchmarks/generate_dataset.py --wallets 100000 --reset
+    python benchmarks/loadtest.py --url http://localhost:8000 --concurrency 10 50 --duration 30
+    python benchmarks/loadtest.py --compare benchmarks/results/20240101-120000.json
+
+Addresses for the per-wallet endpoints are sampled from /wallets before
+the run, so the mix hits real rows.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+from datetime import datetime
+from typing import List, Optional
+
+import aiohttp
+
+from load_driver import run_level
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# (endpoint name, weight); names are the route paths
+MIX = [
+    ("/wallets/top", 4),
+    ("/wallets", 2),
+    ("/wallet/{address}", 2),
+    ("/analytics/{address}", 1),
+    ("/stats/overview", 1),
+]
+TOP_FILTERS = [
+    "limit=50",
+    "limit=100&min_trades=10",
+    "limit=50&min_roi=20&min_win_rate=50",
+    "limit=20&risk_level=Low",
+    "limit=50&min_volume=10000&min_profit=100",
+]
+SORT_COLUMNS = ["roi_percentage", "total_score", "total_volume", "winrate"]
+
+
+async def sample_addresses(session: aiohttp.ClientSession, base_url: str, count: int) -> List[str]:
+    addresses = set()
+    for sort_by in SORT_COLUMNS:
+        for sort_desc in ("true", "false"):
+            url = f"{base_url}/wallets?page_size=100&sort_by={sort_by}&sort_desc={sort_desc}"
+            async with session.get(url) as resp:
+                resp.raise_for_status()
+                body = await resp.json()
+            addresses.update(wallet["address"] for wallet in body["wallets"])
+            if len(addresses) >= count:
+                return list(addresses)[:count]
+    return list(addresses)
+
+
+def make_path(endpoint: str, rng: random.Random, addresses: List[str]) -> str:
+    if endpoint == "/wallets/top":
+        return f"/wallets/top?{rng.choice(TOP_FILTERS)}"
+    if endpoint == "/wallets":
+        return f"/wallets?page={rng.randint(1, 20)}&page_size=20&sort_by={rng.choice(SORT_COLUMNS)}"
+    if endpoint == "/wallet/{address}":
+        return f"/wallet/{rng.choice(addresses)}"
+    if endpoint == "/analytics/{address}":
+        return f"/analytics/{rng.choice(addresses)}"
+    return endpoint
+
+
+def weighted_mix(mix, addresses: List[str]):
+    """Picker factory: endpoints drawn by weight from a per-worker RNG"""
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    def make_picker(seed):
+        rng = random.Random(seed)
+
+        def pick():
+            endpoint = rng.choices(names, weights)[0]
+            return endpoint, make_path(endpoint, rng, addresses)
+        return pick
+    return make_picker
+
+
+async def run_mix(base_url, mix, addresses, concurrency, duration, seed) -> dict:
+    level = await run_level(base_url, weighted_mix(mix, addresses), concurrency, duration, seed)
+    # Report endpoints in mix order
+    level["endpoints"] = {name: level["endpoints"][name] for name, _ in mix if name in level["endpoints"]}
+    return level
+
+
+def print_level(level: dict, previous: Optional[dict] = None):
+    print(f"\nconcurrency={level['concurrency']}")
+    rows = [("overall", level["overall"])] + list(level["endpoints"].items())
+    for name, stats in rows:
+        line = (
+            f"  {name:<22} requests={stats['requests']:<7} rps={stats['rps']:8.1f} "
+            f"p50={stats['p50_ms']:7.1f}ms p95={stats['p95_ms']:7.1f}ms p99={stats['p99_ms']:7.1f}ms "
+            f"errors={stats['errors']}"
+        )
+        if previous is not None:
+            before = previous["overall"] if name == "overall" else previous["endpoints"].get(name)
+            if before and before["p95_ms"] and before["rps"]:
+                line += (
+                    f"  (rps {(stats['rps'] / before['rps'] - 1) * 100:+.0f}%,"
+                    f" p95 {(stats['p95_ms'] / before['p95_ms'] - 1) * 100:+.0f}%)"
+                )
+        print(line)
+
+
+def print_results(results: dict, baseline: Optional[dict] = None):
+    previous = {}
+    if baseline is not None:
+        print(f"compared with {baseline['started_at']} ({baseline.get('label') or 'no label'})")
+        previous = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in results["levels"]:
+        print_level(level, previous.get(level["concurrency"]))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unrecorded load first")
+    parser.add_argument("--addresses", type=int, default=500, help="wallets sampled for per-wallet endpoints")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", help="free text stored with the results, e.g. the commit")
+    parser.add_argument("--output", help=f"results file (default {RESULTS_DIR}/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    base_url = args.url.rstrip("/")
+    async with aiohttp.ClientSession() as session:
+        addresses = await sample_addresses(session, base_url, args.addresses)
+    if not addresses:
+        raise SystemExit("No wallets returned by /wallets; load a dataset first")
+
+    started_at = datetime.now()
+    if args.warmup > 0:
+        await run_mix(base_url, MIX, addresses, max(args.concurrency), args.warmup, args.seed)
+
+    levels = []
+    for concurrency in args.concurrency:
+        levels.append(await run_mix(base_url, MIX, addresses, concurrency, args.duration, args.seed))
+
+    results = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "label": args.label,
+        "url": base_url,
+        "duration": args.duration,
+        "mix": dict(MIX),
+        "addresses": len(addresses),
+        "host": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "levels": levels,
+    }
+    print_results(results, baseline)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, started_at.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nsaved {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""Local stand-in for the Cielo PnL feed, for exercising ingest.py offline.
+
+    python benchmarks/stub_cielo.py --port 8765 --latency-ms 50
+
+Responses are deterministic per wallet address. Every ``--fail-every``-th
+request answers 429 to exercise the retry path.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+from datetime import date, timedelta
+
+from aiohttp import web
+
+SYMBOLS = ["SOL", "BONK", "WIF", "JUP", "PYTH", "RAY", "ORCA", "MEW", "POPCAT", "JTO"]
+
+
+def wallet_payload(address: str, days: int = 30) -> dict:
+    rng = random.Random(hashlib.sha256(address.encode()).digest())
+    tokens = []
+    for symbol in rng.sample(SYMBOLS, rng.randint(1, len(SYMBOLS))):
+        buy = rng.uniform(100, 50000)
+        pnl = buy * rng.uniform(-0.9, 2.5)
+        tokens.append({
+            "token_symbol": symbol,
+            "roi_percentage": pnl / buy * 100,
+            "total_buy_usd": buy,
+            "total_sell_usd": buy + pnl,
+            "num_swaps": rng.randint(1, 60),
+            "total_pnl_usd": pnl,
+            "is_honeypot": False,
+        })
+    total_buy = sum(t["total_buy_usd"] for t in tokens)
+    total_pnl = sum(t["total_pnl_usd"] for t in tokens)
+    today = date.today()
+    daily = [{
+        "date": (today - timedelta(days=days - i)).isoformat(),
+        "pnl_usd": rng.gauss(total_pnl / days, abs(total_pnl) / 5 + 10),
+    } for i in range(days)]
+    return {
+        "total_pnl_usd": total_pnl,
+        "winrate": 100.0 * sum(t["total_pnl_usd"] > 0 for t in tokens) / len(tokens),
+        "total_tokens_traded": len(tokens),
+        "total_roi_percentage": total_pnl / total_buy * 100,
+        "successful_trades": sum(t["total_pnl_usd"] > 0 for t in tokens),
+        "tokens": tokens,
+        "daily_pnl": daily,
+    }
+
+
+def create_app(latency_ms: float = 0, fail_every: int = 0) -> web.Application:
+    state = {"requests": 0}
+
+    async def pnl_tokens(request: web.Request) -> web.Response:
+        state["requests"] += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if fail_every and state["requests"] % fail_every == 0:
+            return web.json_response({"status": "error", "message": "rate limited"}, status=429)
+        wallet = request.query.get("wallet")
+        if not wallet:
+            return web.json_response({"status": "error", "message": "wallet is required"}, status=400)
+        return web.json_response({"status": "ok", "data": wallet_payload(wallet)})
+
+    app = web.Application()
+    app["state"] = state
+    app.router.add_get("/v1/pnl/tokens", pnl_tokens)
+    return app
+
+
+async def start_stub(port: int = 0, latency_ms: float = 0, fail_every: int = 0):
+    """Start the stub in the running loop; returns (runner, base_url)"""
+    runner = web.AppRunner(create_app(latency_ms, fail_every))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{bound_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+    web.run_app(create_app(args.latency_ms, args.fail_every), host="127.0.0.1", port=args.port)
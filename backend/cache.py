@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from shared_store import SharedStore
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+# Shared store of a multi-worker deployment (redis://host:port); serve.py
+# sets it. Unset, every process caches on its own.
+CACHE_URL = os.getenv("CACHE_URL", "")
+# How often a worker checks whether another one invalidated the shared cache
+CACHE_GENERATION_POLL = float(os.getenv("CACHE_GENERATION_POLL", "1"))
+# Shared store key counting invalidations; part of every shared entry key
+GENERATION_KEY = "resp:generation"
+
+# Per-endpoint TTLs in seconds
+CACHE_TTLS = {
+    "stats_overview": float(os.getenv("CACHE_TTL_STATS", "30")),
+    "wallets_top": float(os.getenv("CACHE_TTL_TOP_WALLETS", "15")),
+    "token_wallets": float(os.getenv("CACHE_TTL_TOKEN_WALLETS", "15")),
+}
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+def make_key(endpoint: str, **params) -> str:
+    """Cache key from already parsed query parameters.
+
+    FastAPI has converted the values to their declared types, so "0" and
+    "0.0" produce the same key; None values are dropped.
+    """
+    parts = [f"{name}={params[name]!r}" for name in sorted(params) if params[name] is not None]
+    return endpoint + "?" + "&".join(parts)
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of serialized responses with per-entry TTLs.
+
+    Concurrent misses for the same key share one build, so a burst of
+    dashboard loads runs the query once. With a shared store, a local miss
+    is looked up there before building, so workers share hot responses.
+    Shared entries are keyed by a generation counter that invalidation
+    bumps; the other workers notice it within CACHE_GENERATION_POLL. A
+    build that was running when the cache was invalidated is returned to
+    its callers but not stored, since it may predate the change.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, shared: Optional[SharedStore] = None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self.generation = 0
+        # Bumped by every local or shared invalidation
+        self.epoch = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    @staticmethod
+    def make_entry(body: bytes, ttl: float, etag: Optional[str] = None) -> CacheEntry:
+        return CacheEntry(
+            body=body,
+            etag=etag or '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"',
+            expires_at=time.monotonic() + ttl,
+        )
+
+    def set(self, key: str, body: bytes, ttl: float, etag: Optional[str] = None) -> CacheEntry:
+        return self._store(key, self.make_entry(body, ttl, etag))
+
+    def _store(self, key: str, entry: CacheEntry) -> CacheEntry:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    async def get_or_build(self, key: str, ttl: float, build: Callable[[], Awaitable[bytes]]) -> CacheEntry:
+        """Return the cached entry for key, building it on a miss"""
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        epoch, generation = self.epoch, self.generation
+        try:
+            entry = await self._shared_get(key, generation)
+            if entry is not None:
+                if self.epoch == epoch:
+                    self._store(key, entry)
+            else:
+                entry = self.make_entry(await build(), ttl)
+                if self.epoch == epoch:
+                    self._store(key, entry)
+                    await self._shared_set(key, entry, ttl, generation)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception retrieved
+            future.exception()
+            raise
+        finally:
+            # Invalidation may have let a newer build take the slot
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _shared_key(self, key: str, generation: int) -> str:
+        return f"resp:{generation}:{key}"
+
+    async def _shared_get(self, key: str, generation: int) -> Optional[CacheEntry]:
+        if self.shared is None:
+            return None
+        try:
+            value = await self.shared.get(self._shared_key(key, generation))
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared cache read failed: {e!r}")
+            return None
+        if value is None:
+            return None
+        # Wall clock expiry, etag and body; monotonic clocks differ per process
+        expires_at, etag, body = value.split(b"\n", 2)
+        ttl = float(expires_at) - time.time()
+        if ttl <= 0:
+            return None
+        self.shared_hits += 1
+        return self.make_entry(body, ttl, etag.decode())
+
+    async def _shared_set(self, key: str, entry: CacheEntry, ttl: float, generation: int):
+        if self.shared is None:
+            return
+        value = b"%f\n%s\n" % (time.time() + ttl, entry.etag.encode()) + entry.body
+        try:
+            await self.shared.set(self._shared_key(key, generation), value, ttl)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared cache write failed: {e!r}")
+
+    async def sync_generation(self) -> bool:
+        """Adopt the shared generation; True if another worker bumped it"""
+        if self.shared is None:
+            return False
+        generation = int(await self.shared.get(GENERATION_KEY) or 0)
+        if generation == self.generation:
+            return False
+        self.generation = generation
+        self._entries.clear()
+        self._inflight.clear()
+        self.epoch += 1
+        return True
+
+    async def publish_invalidation(self):
+        """Invalidate the entries of every worker"""
+        self.invalidate()
+        if self.shared is not None:
+            self.generation = await self.shared.incr(GENERATION_KEY)
+
+    async def watch_generation(self, on_change: Callable[[], Awaitable[None]], interval: float = CACHE_GENERATION_POLL):
+        """Poll the shared generation, calling on_change when it moves"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self.sync_generation():
+                    self.invalidations += 1
+                    await on_change()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Shared cache generation check failed: {e!r}")
+
+    def invalidate(self, prefix: Optional[str] = None):
+        """Drop every entry, or only those whose key starts with prefix"""
+        if prefix is None:
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+            for key in [k for k in self._inflight if k.startswith(prefix)]:
+                del self._inflight[key]
+        self.epoch += 1
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "shared": self.shared is not None,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+            "generation": self.generation,
+        }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the entity tag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+response_cache = ResponseCache(shared=SharedStore(CACHE_URL) if CACHE_URL else None)
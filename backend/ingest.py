@@ -0,0 +1,309 @@
+"""Wallet ingestion worker.
+
+Fetches PnL/token data for many wallets from the Cielo feed concurrently,
+computes the wallet_analysis fields and bulk upserts them.
+
+    python ingest.py --addresses-file wallets.txt --concurrency 20 --rate 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from sqlalchemy import text
+
+from database import engine
+from risk import series_risk_metrics
+
+logger = logging.getLogger(__name__)
+
+CIELO_BASE_URL = os.getenv("CIELO_BASE_URL", "https://feed-api.cielo.finance")
+CIELO_API_KEY = os.getenv("CIELO_API_KEY", "")
+
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "20"))
+INGEST_RATE_PER_HOST = float(os.getenv("INGEST_RATE_PER_HOST", "10"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+INGEST_MAX_RETRIES = 3
+
+# risk_metrics from Cielo's daily PnL only fill in for wallets the trade
+# risk pass (risk.py) has not scored yet; once risk_updated_at is set its
+# keys win, so the two definitions never overwrite each other.
+UPSERT_ANALYSIS_QUERY = """
+INSERT INTO wallet_analysis (
+    wallet_address, total_pnl_usd, winrate, total_trades, roi_percentage,
+    avg_trade_size, total_volume, consistency_score, token_metrics,
+    risk_metrics, last_updated
+)
+SELECT
+    a.wallet_address, a.total_pnl_usd, a.winrate, a.total_trades, a.roi_percentage,
+    a.avg_trade_size, a.total_volume, a.consistency_score,
+    CAST(a.token_metrics AS JSONB), CAST(a.risk_metrics AS JSONB), NOW()
+FROM unnest(
+    CAST(:wallet_address AS TEXT[]),
+    CAST(:total_pnl_usd AS DOUBLE PRECISION[]),
+    CAST(:winrate AS DOUBLE PRECISION[]),
+    CAST(:total_trades AS INTEGER[]),
+    CAST(:roi_percentage AS DOUBLE PRECISION[]),
+    CAST(:avg_trade_size AS DOUBLE PRECISION[]),
+    CAST(:total_volume AS DOUBLE PRECISION[]),
+    CAST(:consistency_score AS DOUBLE PRECISION[]),
+    CAST(:token_metrics AS TEXT[]),
+    CAST(:risk_metrics AS TEXT[])
+) AS a(
+    wallet_address, total_pnl_usd, winrate, total_trades, roi_percentage,
+    avg_trade_size, total_volume, consistency_score, token_metrics, risk_metrics
+)
+ON CONFLICT (wallet_address) DO UPDATE SET
+    total_pnl_usd = EXCLUDED.total_pnl_usd,
+    winrate = EXCLUDED.winrate,
+    total_trades = EXCLUDED.total_trades,
+    roi_percentage = EXCLUDED.roi_percentage,
+    avg_trade_size = EXCLUDED.avg_trade_size,
+    total_volume = EXCLUDED.total_volume,
+    consistency_score = EXCLUDED.consistency_score,
+    token_metrics = EXCLUDED.token_metrics,
+    risk_metrics = CASE
+        WHEN wallet_analysis.risk_updated_at IS NULL THEN EXCLUDED.risk_metrics
+        ELSE EXCLUDED.risk_metrics || wallet_analysis.risk_metrics
+    END,
+    last_updated = EXCLUDED.last_updated
+"""
+
+
+class HostRateLimiter:
+    """Token bucket per host: at most ``rate`` requests a second, bursts of ``burst``"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._buckets: Dict[str, list] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, host: str):
+        if self.rate <= 0:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            bucket = self._buckets.setdefault(host, [float(self.burst), time.monotonic()])
+            while True:
+                now = time.monotonic()
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                if bucket[0] >= 1:
+                    bucket[0] -= 1
+                    return
+                await asyncio.sleep((1 - bucket[0]) / self.rate)
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def analyze_wallet(address: str, data: dict) -> dict:
+    """Compute the wallet_analysis row of one wallet from its Cielo PnL payload"""
+    tokens = data.get("tokens") or []
+    token_metrics = []
+    total_trades = 0
+    total_volume = 0.0
+    total_buy = 0.0
+    profitable_tokens = 0
+    for token in tokens:
+        buy = _float(token.get("total_buy_usd"))
+        sell = _float(token.get("total_sell_usd"))
+        swaps = int(_float(token.get("num_swaps")))
+        profit = _float(token.get("total_pnl_usd"))
+        total_trades += swaps
+        total_volume += buy + sell
+        total_buy += buy
+        profitable_tokens += profit > 0
+        token_metrics.append({
+            "symbol": token.get("token_symbol") or "",
+            "roi": _float(token.get("roi_percentage")),
+            "volume": buy + sell,
+            "num_trades": swaps,
+            "profit": profit,
+        })
+
+    daily_pnl = [_float(day.get("pnl_usd")) for day in data.get("daily_pnl") or []]
+    if daily_pnl:
+        # Share of active days that closed in profit
+        active = [pnl for pnl in daily_pnl if pnl != 0]
+        consistency = 100.0 * sum(pnl > 0 for pnl in active) / len(active) if active else 50.0
+    else:
+        consistency = 100.0 * profitable_tokens / len(tokens) if tokens else 50.0
+
+    winrate = data.get("winrate")
+    if winrate is None:
+        winrate = 100.0 * profitable_tokens / len(tokens) if tokens else 0.0
+
+    return {
+        "wallet_address": address,
+        "total_pnl_usd": _float(data.get("total_pnl_usd")),
+        "winrate": _float(winrate),
+        "total_trades": total_trades,
+        "roi_percentage": _float(data.get("total_roi_percentage")),
+        "avg_trade_size": total_volume / total_trades if total_trades else 0.0,
+        "total_volume": total_volume,
+        "consistency_score": round(consistency, 2),
+        "token_metrics": json.dumps(token_metrics),
+        "risk_metrics": json.dumps(series_risk_metrics(daily_pnl, total_buy)),
+    }
+
+
+async def upsert_wallet_analysis(records: List[dict]):
+    """Write analysed wallets with one multi-row INSERT ... ON CONFLICT"""
+    if not records:
+        return
+    columns = {key: [record[key] for record in records] for key in records[0]}
+    async with engine.connect() as conn:
+        await conn.execute(text(UPSERT_ANALYSIS_QUERY), columns)
+        await conn.commit()
+
+
+class WalletIngestor:
+    """Concurrent fetch → analyse → batched upsert pipeline"""
+
+    def __init__(
+        self,
+        base_url: str = CIELO_BASE_URL,
+        concurrency: int = INGEST_CONCURRENCY,
+        rate_per_host: float = INGEST_RATE_PER_HOST,
+        batch_size: int = INGEST_BATCH_SIZE,
+        days: str = "30d",
+        write: bool = True,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = HostRateLimiter(rate_per_host)
+        self.batch_size = batch_size
+        self.days = days
+        self.write = write
+        self.host = urlparse(self.base_url).netloc
+        self.fetched = 0
+        self.failed = 0
+        self.written = 0
+        self.write_failed = 0
+        # Requests holding a concurrency slot, and the most seen at once
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._pending: List[dict] = []
+        self._flush_lock = asyncio.Lock()
+
+    def _headers(self) -> dict:
+        headers = {"Accept": "application/json"}
+        if CIELO_API_KEY:
+            headers["API-KEY"] = CIELO_API_KEY
+        return headers
+
+    async def fetch_wallet(self, session: aiohttp.ClientSession, address: str) -> Optional[dict]:
+        url = f"{self.base_url}/v1/pnl/tokens"
+        params = {"wallet": address, "skip_unrealized_pnl": "true", "days": self.days, "page": "1"}
+        for attempt in range(INGEST_MAX_RETRIES):
+            async with self.semaphore:
+                await self.limiter.acquire(self.host)
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                try:
+                    async with session.get(url, params=params, headers=self._headers()) as resp:
+                        if resp.status == 429 or resp.status >= 500:
+                            raise aiohttp.ClientResponseError(
+                                resp.request_info, resp.history, status=resp.status
+                            )
+                        resp.raise_for_status()
+                        payload = await resp.json()
+                        return payload.get("data") or {}
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status == 429 or e.status >= 500
+                    if not retryable or attempt == INGEST_MAX_RETRIES - 1:
+                        logger.error(f"Error fetching wallet {address}: {e}")
+                        return None
+                finally:
+                    self.in_flight -= 1
+            await asyncio.sleep(0.5 * 2 ** attempt)
+        return None
+
+    async def _process(self, session: aiohttp.ClientSession, address: str):
+        data = await self.fetch_wallet(session, address)
+        if data is None:
+            self.failed += 1
+            return
+        self.fetched += 1
+        self._pending.append(analyze_wallet(address, data))
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            if not batch or not self.write:
+                return
+            try:
+                await upsert_wallet_analysis(batch)
+            except Exception as e:
+                # The other batches are independent; keep ingesting
+                self.write_failed += len(batch)
+                logger.error(f"Error writing batch of {len(batch)} wallets: {e}")
+                return
+            self.written += len(batch)
+
+    async def run(self, addresses: Iterable[str]) -> dict:
+        """Ingest every address and return a throughput report"""
+        addresses = list(dict.fromkeys(a.strip() for a in addresses if a.strip()))
+        start = time.perf_counter()
+        timeout = aiohttp.ClientTimeout(total=30)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            await asyncio.gather(*[self._process(session, address) for address in addresses])
+        await self.flush()
+        elapsed = time.perf_counter() - start
+        return {
+            "wallets": len(addresses),
+            "fetched": self.fetched,
+            "failed": self.failed,
+            "written": self.written,
+            "write_failed": self.write_failed,
+            "peak_in_flight": self.peak_in_flight,
+            "seconds": round(elapsed, 3),
+            "wallets_per_second": round(self.fetched / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--addresses-file", required=True, help="one wallet address per line")
+    parser.add_argument("--base-url", default=CIELO_BASE_URL)
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=INGEST_RATE_PER_HOST, help="requests per second per host")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--days", default="30d")
+    parser.add_argument("--dry-run", action="store_true", help="fetch and analyse without writing")
+    args = parser.parse_args()
+
+    with open(args.addresses_file) as f:
+        addresses = f.readlines()
+
+    ingestor = WalletIngestor(
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        rate_per_host=args.rate,
+        batch_size=args.batch_size,
+        days=args.days,
+        write=not args.dry_run,
+    )
+    report = await ingestor.run(addresses)
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
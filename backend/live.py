@@ -0,0 +1,185 @@
+"""Live /wallets/top updates over server-sent events.
+
+Subscribers are grouped into topics by filter set. After each score
+refresh a topic is recomputed once, only if the changed wallets can
+affect it, and the diff is serialized once and fanned out to every
+subscriber of that topic. Database load therefore follows the number of
+distinct filter sets, not the number of connected clients.
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "16"))
+LIVE_HEARTBEAT = float(os.getenv("LIVE_HEARTBEAT", "15"))
+LIVE_RECOMPUTE_CONCURRENCY = int(os.getenv("LIVE_RECOMPUTE_CONCURRENCY", "4"))
+
+# Filter name -> column of a score change record it bounds from below
+MIN_FILTERS = {
+    "min_roi": "roi_percentage",
+    "min_win_rate": "winrate",
+    "min_trades": "total_trades",
+    "min_volume": "total_volume",
+    "min_profit": "total_pnl_usd",
+}
+
+
+def sse_event(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+@dataclass
+class Topic:
+    key: str
+    filters: dict
+    build: Callable[[], Awaitable[List[dict]]]
+    subscribers: Set[asyncio.Queue] = field(default_factory=set)
+    records: List[dict] = field(default_factory=list)
+    # Serialized record per address, to detect updates without decoding
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+    snapshot: Optional[bytes] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def may_change(self, changes: Optional[List[dict]]) -> bool:
+        """Whether any changed wallet can enter, leave or move in this ranking.
+
+        ``None`` means the changes are unknown, e.g. they were applied by
+        another worker process.
+        """
+        if self.snapshot is None or changes is None:
+            return True
+        limit = self.filters["limit"]
+        floor = self.records[-1]["total_score"] if len(self.records) >= limit else None
+        for change in changes:
+            if change["wallet_address"] in self.encoded:
+                return True
+            if change.get("deleted"):
+                continue
+            if any(change[column] < self.filters[name] for name, column in MIN_FILTERS.items()):
+                continue
+            risk_level = self.filters.get("risk_level")
+            if risk_level is not None and change["risk_rating"].lower() != risk_level:
+                continue
+            token = self.filters.get("token")
+            if token is not None and token not in change["token_symbols"]:
+                continue
+            if floor is None or change["total_score"] >= floor:
+                return True
+        return False
+
+
+class LiveHub:
+    """Topics keyed by filter set, each with its own subscriber queues"""
+
+    def __init__(self):
+        self.topics: Dict[str, Topic] = {}
+        self.recomputes = 0
+        self.skipped = 0
+        self._semaphore = asyncio.Semaphore(LIVE_RECOMPUTE_CONCURRENCY)
+
+    async def _refresh(self, topic: Topic, initial: bool = False) -> Optional[bytes]:
+        """Recompute a topic; returns the diff event, or None if unchanged.
+
+        With ``initial`` only a topic that has no snapshot yet is built, so
+        a burst of first subscribers shares one query.
+        """
+        async with topic.lock:
+            if initial and topic.snapshot is not None:
+                return None
+            async with self._semaphore:
+                records = await topic.build()
+            self.recomputes += 1
+
+            encoded = {record["address"]: dumps(record) for record in records}
+            previous = topic.encoded
+            added = [r for r in records if r["address"] not in previous]
+            updated = [
+                r for r in records
+                if r["address"] in previous and previous[r["address"]] != encoded[r["address"]]
+            ]
+            removed = [address for address in previous if address not in encoded]
+            order = [r["address"] for r in records]
+            reordered = order != [r["address"] for r in topic.records]
+
+            first = topic.snapshot is None
+            topic.records, topic.encoded = records, encoded
+            topic.snapshot = sse_event("snapshot", {"wallets": records})
+            if first or not (added or updated or removed or reordered):
+                return None
+            return sse_event("diff", {
+                "added": added,
+                "updated": updated,
+                "removed": removed,
+                "order": order,
+            })
+
+    def _offer(self, topic: Topic, queue: asyncio.Queue, event: bytes):
+        """Queue an event; a subscriber that fell behind is resynced with a snapshot"""
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            event = topic.snapshot
+        queue.put_nowait(event)
+
+    async def subscribe(
+        self, key: str, filters: dict, build: Callable[[], Awaitable[List[dict]]]
+    ) -> AsyncIterator[bytes]:
+        """Stream the topic's snapshot, then its diffs, as SSE bytes"""
+        topic = self.topics.get(key)
+        if topic is None:
+            topic = self.topics[key] = Topic(key=key, filters=filters, build=build)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        topic.subscribers.add(queue)
+        try:
+            if topic.snapshot is None:
+                await self._refresh(topic, initial=True)
+            yield topic.snapshot
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), LIVE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Comment line, keeps proxies from closing an idle stream
+                    yield b": ping\n\n"
+        finally:
+            topic.subscribers.discard(queue)
+            if not topic.subscribers and self.topics.get(key) is topic:
+                del self.topics[key]
+
+    async def _publish(self, topic: Topic, changes: Optional[List[dict]]):
+        if not topic.may_change(changes):
+            self.skipped += 1
+            return
+        try:
+            event = await self._refresh(topic)
+        except Exception as e:
+            logger.error(f"Error recomputing live topic {topic.key}: {e}")
+            return
+        if event is not None:
+            for queue in list(topic.subscribers):
+                self._offer(topic, queue, event)
+
+    async def on_changes(self, changes: Optional[List[dict]]):
+        """Score change listener: recompute affected topics and fan out diffs.
+
+        Pass None to recompute every topic.
+        """
+        topics = [topic for topic in self.topics.values() if topic.subscribers]
+        if topics:
+            await asyncio.gather(*[self._publish(topic, changes) for topic in topics])
+
+    def stats(self) -> dict:
+        return {
+            "topics": len(self.topics),
+            "subscribers": sum(len(topic.subscribers) for topic in self.topics.values()),
+            "recomputes": self.recomputes,
+            "skipped": self.skipped,
+        }
+
+
+live_hub = LiveHub()
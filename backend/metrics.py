@@ -0,0 +1,311 @@
+"""Request instrumentation exposed in the Prometheus text format.
+
+MetricsMiddleware times every request and the phases inside it (DB,
+scoring, model validation, serialization); the phases are accumulated in
+a context variable by ``timed()`` blocks and SQLAlchemy events, so code
+on the hot path only marks where a phase starts and ends. Pool checkout
+wait, pool usage and per-statement timings come from the engine.
+
+Rendering is done here rather than with prometheus_client to keep the
+dependency list unchanged; the output follows the text exposition format.
+"""
+import bisect
+import re
+import sys
+import threading
+import time
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+PHASES = ("db", "scoring", "model", "serialization")
+
+# Phase durations of the current request, None outside a request
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        # label values -> [bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = _labels(self.label_names, labels, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = _labels(self.label_names, labels, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {values[-1]}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {values[-2]}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {values[-1]}"
+
+
+class Gauge:
+    """Gauge read from a callback at scrape time"""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float], type: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.type = type
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield f"{self.name} {self.read()}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # A broken callback must not take the whole scrape down
+                continue
+        return ("\n".join(lines) + "\n").encode()
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route", "status")
+))
+REQUEST_PHASE = registry.register(Histogram(
+    "http_request_phase_seconds", "Time spent per phase of a request", ("route", "phase")
+))
+STATEMENT_DURATION = registry.register(Histogram(
+    "db_statement_duration_seconds", "SQL statement execution time", ("statement",)
+))
+POOL_CHECKOUT_WAIT = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection"
+))
+
+_in_flight = 0
+registry.register(Gauge("http_requests_in_flight", "Requests being served", lambda: _in_flight))
+
+
+@contextmanager
+def timed(phase: str):
+    """Add the block's duration to a phase of the current request"""
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and phase split per route.
+
+    Timing stops when the last body chunk is sent, so streamed responses
+    are measured in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases: Dict[str, float] = {}
+        token = _phases.set(phases)
+        start = time.perf_counter()
+        status = ["500"]
+        recorded = [False]
+        _in_flight += 1
+
+        def record():
+            global _in_flight
+            if recorded[0]:
+                return
+            recorded[0] = True
+            _in_flight -= 1
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            REQUEST_DURATION.observe(time.perf_counter() - start, scope["method"], path, status[0])
+            for phase in PHASES:
+                if phase in phases:
+                    REQUEST_PHASE.observe(phases[phase], path, phase)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record()
+            _phases.reset(token)
+
+
+# First table after FROM/INTO/UPDATE/JOIN; identifiers followed by a
+# parenthesis (EXTRACT(EPOCH FROM col), unnest(...)) are not tables
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+([A-Za-z_][\w.]*)\b(?![()])", re.IGNORECASE)
+
+
+def statement_label(statement: str) -> str:
+    """Low-cardinality label for a statement: verb and first table"""
+    words = statement.split(None, 1)
+    verb = words[0].upper() if words else "?"
+    match = _STATEMENT_TABLE.search(statement)
+    return f"{verb} {match.group(1)}" if match else verb
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine):
+    """Statement timings, DB phase time and pool gauges for an async engine"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        STATEMENT_DURATION.observe(elapsed, statement_label(statement))
+        phases = _phases.get()
+        if phases is not None:
+            phases["db"] = phases.get("db", 0.0) + elapsed
+
+    # engine.pool is replaced on dispose(), so read it at scrape time
+    registry.register(Gauge("db_pool_size", "Configured pool size", lambda: engine.pool.size()))
+    registry.register(Gauge("db_pool_connections_in_use", "Connections checked out", lambda: engine.pool.checkedout()))
+    registry.register(Gauge("db_pool_overflow", "Connections beyond the pool size", lambda: max(engine.pool.overflow(), 0)))
+
+
+def instrument_response_validation():
+    """Count FastAPI's response_model validation and encoding as model time.
+
+    FastAPI has no hook around serialize_response, so the module attribute
+    the request handler looks up is wrapped.
+    """
+    import fastapi.routing
+
+    original = fastapi.routing.serialize_response
+    if getattr(original, "_timed", False):
+        return
+
+    async def serialize_response(*args, **kwargs):
+        with timed("model"):
+            return await original(*args, **kwargs)
+
+    serialize_response._timed = True
+    fastapi.routing.serialize_response = serialize_response
+
+
+class SamplingProfiler:
+    """Samples the stack of the event loop thread into collapsed stacks.
+
+    The output is the folded format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.samples: TallyCounter = TallyCounter()
+        self.interval = 0.005
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        if self.running:
+            return
+        self.samples = TallyCounter()
+        self.interval = interval
+        self._stop.clear()
+        target = thread_id or threading.get_ident()
+        self._thread = threading.Thread(target=self._run, args=(target,), daemon=True, name="sampling-profiler")
+        self._thread.start()
+
+    def _run(self, thread_id: int):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks"""
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,61 @@
+"""Apply the SQL files in migrations/ in order.
+
+Each file runs once, in its own transaction, and is recorded in the
+schema_migrations table. An advisory lock keeps concurrent workers from
+applying the same migration twice.
+
+    python migrate.py
+"""
+import asyncio
+import logging
+import os
+
+import asyncpg
+
+from database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_LOCK_ID = 72707301
+
+
+def _driver_dsn(url: str) -> str:
+    """asyncpg wants a plain postgresql:// DSN"""
+    scheme, _, rest = url.partition("://")
+    return "postgresql://" + rest
+
+
+async def run_migrations() -> list:
+    """Apply pending migrations and return the names of the ones applied"""
+    applied = []
+    conn = await asyncpg.connect(_driver_dsn(DATABASE_URL))
+    try:
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        """)
+        done = {r["name"] for r in await conn.fetch("SELECT name FROM schema_migrations")}
+
+        for name in sorted(os.listdir(MIGRATIONS_DIR)):
+            if not name.endswith(".sql") or name in done:
+                continue
+            with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+                sql = f.read()
+            async with conn.transaction():
+                await conn.execute(sql)
+                await conn.execute("INSERT INTO schema_migrations (name) VALUES ($1)", name)
+            logger.info(f"Applied migration {name}")
+            applied.append(name)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+        await conn.close()
+    return applied
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_migrations())
@@ -0,0 +1,36 @@
+-- Base tables the API reads, for fresh databases. Existing installs
+-- already have them, so every statement is a no-op there.
+CREATE TABLE IF NOT EXISTS wallet_analysis (
+    wallet_address      TEXT PRIMARY KEY,
+    total_pnl_usd       NUMERIC,
+    winrate             NUMERIC,
+    total_trades        INTEGER,
+    roi_percentage      NUMERIC,
+    avg_trade_size      NUMERIC,
+    total_volume        NUMERIC,
+    consistency_score   NUMERIC,
+    token_metrics       JSONB,
+    risk_metrics        JSONB,
+    last_updated        TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS trades (
+    id              SERIAL PRIMARY KEY,
+    wallet_address  TEXT,
+    token_address   TEXT,
+    trade_type      TEXT,
+    status          TEXT,
+    price_usd       NUMERIC,
+    amount          NUMERIC,
+    created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS copy_trade_setups (
+    wallet_address  TEXT PRIMARY KEY,
+    active          BOOLEAN,
+    max_trade_size  NUMERIC,
+    stop_loss       NUMERIC,
+    take_profit     NUMERIC,
+    notes           TEXT,
+    updated_at      TIMESTAMP
+);
@@ -0,0 +1,36 @@
+-- Persisted wallet scores, recomputed only for wallets whose
+-- wallet_analysis.last_updated changed since they were last scored.
+-- Filter columns are copied from wallet_analysis (NULLs as 0) so ranking,
+-- filtering and pagination run on this table alone.
+CREATE TABLE IF NOT EXISTS wallet_scores (
+    wallet_address      TEXT PRIMARY KEY,
+    total_score         DOUBLE PRECISION NOT NULL DEFAULT 0,
+    roi_score           DOUBLE PRECISION NOT NULL DEFAULT 0,
+    consistency_score   DOUBLE PRECISION NOT NULL DEFAULT 0,
+    volume_score        DOUBLE PRECISION NOT NULL DEFAULT 0,
+    trade_score         DOUBLE PRECISION NOT NULL DEFAULT 0,
+    risk_score          DOUBLE PRECISION NOT NULL DEFAULT 0,
+    roi_percentage      DOUBLE PRECISION NOT NULL DEFAULT 0,
+    winrate             DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_trades        INTEGER NOT NULL DEFAULT 0,
+    total_volume        DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_pnl_usd       DOUBLE PRECISION NOT NULL DEFAULT 0,
+    max_drawdown        DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sharpe_ratio        DOUBLE PRECISION NOT NULL DEFAULT 0,
+    risk_rating         TEXT NOT NULL DEFAULT 'Medium',
+    source_updated_at   TIMESTAMP,
+    scored_at           TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_total_score
+    ON wallet_scores (total_score DESC, wallet_address);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_risk_rating_score
+    ON wallet_scores (risk_rating, total_score DESC, wallet_address);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_source_updated_at
+    ON wallet_scores (source_updated_at);
+
+-- Change detection for the incremental refresh
+CREATE INDEX IF NOT EXISTS idx_wallet_analysis_last_updated
+    ON wallet_analysis (last_updated);
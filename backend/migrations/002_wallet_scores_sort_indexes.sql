@@ -0,0 +1,20 @@
+-- Keyset pagination for GET /wallets: one (sort column, wallet_address)
+-- index per whitelisted sort column. Scanned forwards for ascending and
+-- backwards for descending pages.
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_page_total_score
+    ON wallet_scores (total_score, wallet_address);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_page_roi_percentage
+    ON wallet_scores (roi_percentage, wallet_address);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_page_winrate
+    ON wallet_scores (winrate, wallet_address);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_page_total_trades
+    ON wallet_scores (total_trades, wallet_address);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_page_total_volume
+    ON wallet_scores (total_volume, wallet_address);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_page_total_pnl_usd
+    ON wallet_scores (total_pnl_usd, wallet_address);
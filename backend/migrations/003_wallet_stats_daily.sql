@@ -0,0 +1,20 @@
+-- Daily rollups of wallet_analysis keyed on last_updated::date, so
+-- /stats/overview reads a handful of rows instead of scanning the table.
+-- Wallets with a NULL last_updated are kept under day '-infinity'.
+-- The pos_* columns cover wallets with roi_percentage > 0 AND winrate > 0,
+-- the population of the overview totals.
+CREATE TABLE IF NOT EXISTS wallet_stats_daily (
+    day                 DATE PRIMARY KEY,
+    wallet_count        BIGINT NOT NULL DEFAULT 0,
+    roi_count           BIGINT NOT NULL DEFAULT 0,
+    roi_sum             DOUBLE PRECISION NOT NULL DEFAULT 0,
+    winrate_count       BIGINT NOT NULL DEFAULT 0,
+    winrate_sum         DOUBLE PRECISION NOT NULL DEFAULT 0,
+    top_performers      BIGINT NOT NULL DEFAULT 0,
+    pos_count           BIGINT NOT NULL DEFAULT 0,
+    pos_roi_sum         DOUBLE PRECISION NOT NULL DEFAULT 0,
+    pos_winrate_sum     DOUBLE PRECISION NOT NULL DEFAULT 0,
+    pos_best_roi        DOUBLE PRECISION,
+    pos_worst_roi       DOUBLE PRECISION,
+    refreshed_at        TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,107 @@
+-- Per-wallet daily trade rollup behind /analytics/{address}, kept in sync
+-- with trades by statement-level triggers. daily_pnl follows the analytics
+-- convention: executed sells add price_usd * amount, everything else
+-- subtracts it. Trades without a wallet or a timestamp have no row to
+-- land in and are left out; trades without a price count as 0.
+CREATE TABLE IF NOT EXISTS wallet_daily_pnl (
+    wallet_address  TEXT NOT NULL,
+    day             TIMESTAMP NOT NULL,
+    trades          BIGINT NOT NULL DEFAULT 0,
+    successful      BIGINT NOT NULL DEFAULT 0,
+    daily_pnl       NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (wallet_address, day)
+);
+
+CREATE OR REPLACE FUNCTION wallet_daily_pnl_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO wallet_daily_pnl AS p (wallet_address, day, trades, successful, daily_pnl)
+        SELECT
+            wallet_address,
+            DATE_TRUNC('day', created_at),
+            -COUNT(*),
+            -SUM(CASE WHEN status = 'executed' THEN 1 ELSE 0 END),
+            -COALESCE(SUM(CASE
+                WHEN trade_type = 'sell' AND status = 'executed'
+                THEN price_usd * amount
+                ELSE -price_usd * amount
+                END), 0)
+        FROM old_rows
+        WHERE wallet_address IS NOT NULL AND created_at IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (wallet_address, day) DO UPDATE SET
+            trades = p.trades + EXCLUDED.trades,
+            successful = p.successful + EXCLUDED.successful,
+            daily_pnl = p.daily_pnl + EXCLUDED.daily_pnl;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO wallet_daily_pnl AS p (wallet_address, day, trades, successful, daily_pnl)
+        SELECT
+            wallet_address,
+            DATE_TRUNC('day', created_at),
+            COUNT(*),
+            SUM(CASE WHEN status = 'executed' THEN 1 ELSE 0 END),
+            COALESCE(SUM(CASE
+                WHEN trade_type = 'sell' AND status = 'executed'
+                THEN price_usd * amount
+                ELSE -price_usd * amount
+                END), 0)
+        FROM new_rows
+        WHERE wallet_address IS NOT NULL AND created_at IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (wallet_address, day) DO UPDATE SET
+            trades = p.trades + EXCLUDED.trades,
+            successful = p.successful + EXCLUDED.successful,
+            daily_pnl = p.daily_pnl + EXCLUDED.daily_pnl;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        -- Drop days that no longer have any trades
+        DELETE FROM wallet_daily_pnl p
+        USING (SELECT DISTINCT wallet_address, DATE_TRUNC('day', created_at) AS day FROM old_rows) o
+        WHERE p.wallet_address = o.wallet_address
+          AND p.day = o.day
+          AND p.trades <= 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables allow only one event per trigger
+DROP TRIGGER IF EXISTS trades_daily_pnl_insert ON trades;
+CREATE TRIGGER trades_daily_pnl_insert
+    AFTER INSERT ON trades
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_daily_pnl_apply();
+
+DROP TRIGGER IF EXISTS trades_daily_pnl_update ON trades;
+CREATE TRIGGER trades_daily_pnl_update
+    AFTER UPDATE ON trades
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_daily_pnl_apply();
+
+DROP TRIGGER IF EXISTS trades_daily_pnl_delete ON trades;
+CREATE TRIGGER trades_daily_pnl_delete
+    AFTER DELETE ON trades
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_daily_pnl_apply();
+
+-- Backfill from the existing trades; the migration runs in one
+-- transaction, so no trade is counted twice
+TRUNCATE wallet_daily_pnl;
+INSERT INTO wallet_daily_pnl (wallet_address, day, trades, successful, daily_pnl)
+SELECT
+    wallet_address,
+    DATE_TRUNC('day', created_at),
+    COUNT(*),
+    SUM(CASE WHEN status = 'executed' THEN 1 ELSE 0 END),
+    COALESCE(SUM(CASE
+        WHEN trade_type = 'sell' AND status = 'executed'
+        THEN price_usd * amount
+        ELSE -price_usd * amount
+        END), 0)
+FROM trades
+WHERE wallet_address IS NOT NULL AND created_at IS NOT NULL
+GROUP BY 1, 2;
@@ -0,0 +1,4 @@
+-- The risk engine reads each wallet's trades in time order; this keeps a
+-- chunk of wallets an index range scan instead of a sort of the table.
+CREATE INDEX IF NOT EXISTS idx_trades_wallet_created
+    ON trades (wallet_address, created_at, id);
@@ -0,0 +1,31 @@
+-- Alert rules and their firings behind /alerts.
+-- metric_below / metric_above watch one metric of one wallet;
+-- enters_top fires for every wallet that enters the top_n by total_score.
+CREATE TABLE IF NOT EXISTS alert_rules (
+    id              BIGSERIAL PRIMARY KEY,
+    user_id         TEXT NOT NULL,
+    kind            TEXT NOT NULL CHECK (kind IN ('metric_below', 'metric_above', 'enters_top')),
+    wallet_address  TEXT,
+    metric          TEXT,
+    threshold       DOUBLE PRECISION,
+    top_n           INTEGER,
+    created_at      TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_alert_rules_user ON alert_rules (user_id, id);
+
+CREATE TABLE IF NOT EXISTS alert_events (
+    id              BIGSERIAL PRIMARY KEY,
+    rule_id         BIGINT NOT NULL REFERENCES alert_rules (id) ON DELETE CASCADE,
+    user_id         TEXT NOT NULL,
+    wallet_address  TEXT NOT NULL,
+    metric          TEXT NOT NULL,
+    value           DOUBLE PRECISION,
+    previous_value  DOUBLE PRECISION,
+    message         TEXT NOT NULL,
+    fired_at        TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- GET /alerts pages a user's firings newest first by id
+CREATE INDEX IF NOT EXISTS idx_alert_events_user ON alert_events (user_id, id DESC);
+CREATE INDEX IF NOT EXISTS idx_alert_events_rule ON alert_events (rule_id);
@@ -0,0 +1,117 @@
+-- Per-wallet token stats normalized out of wallet_analysis.token_metrics,
+-- kept in sync by statement-level triggers. Token filters on /wallets/top
+-- and the per-token rankings of /tokens/{symbol}/wallets are index lookups
+-- here instead of JSONB scans.
+CREATE TABLE IF NOT EXISTS wallet_token_stats (
+    wallet_address  TEXT NOT NULL,
+    symbol          TEXT NOT NULL,
+    roi             DOUBLE PRECISION NOT NULL DEFAULT 0,
+    volume          DOUBLE PRECISION NOT NULL DEFAULT 0,
+    num_trades      INTEGER NOT NULL DEFAULT 0,
+    profit          DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (wallet_address, symbol)
+);
+
+-- Rankings of one token's wallets; also drive the token filter when the
+-- token is rare
+CREATE INDEX IF NOT EXISTS idx_wallet_token_stats_symbol_profit
+    ON wallet_token_stats (symbol, profit DESC, wallet_address);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_token_stats_symbol_roi
+    ON wallet_token_stats (symbol, roi DESC, wallet_address);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_token_stats_symbol_volume
+    ON wallet_token_stats (symbol, volume DESC, wallet_address);
+
+-- Rows of a token_metrics array. Malformed entries are skipped and
+-- non-numeric fields read as 0. Tokens sharing a symbol are merged, with
+-- roi weighted by volume.
+CREATE OR REPLACE FUNCTION token_stats_from_metrics(metrics JSONB)
+RETURNS TABLE (symbol TEXT, roi DOUBLE PRECISION, volume DOUBLE PRECISION, num_trades INTEGER, profit DOUBLE PRECISION) AS $$
+    WITH tokens AS (
+        SELECT
+            t->>'symbol' AS symbol,
+            CASE WHEN jsonb_typeof(t->'roi') = 'number' THEN (t->>'roi')::float8 ELSE 0 END AS roi,
+            CASE WHEN jsonb_typeof(t->'volume') = 'number' THEN (t->>'volume')::float8 ELSE 0 END AS volume,
+            CASE WHEN jsonb_typeof(t->'num_trades') = 'number' THEN (t->>'num_trades')::float8 ELSE 0 END AS num_trades,
+            CASE WHEN jsonb_typeof(t->'profit') = 'number' THEN (t->>'profit')::float8 ELSE 0 END AS profit
+        FROM jsonb_array_elements(CASE WHEN jsonb_typeof(metrics) = 'array' THEN metrics ELSE '[]'::jsonb END) t
+        WHERE jsonb_typeof(t) = 'object'
+        AND COALESCE(t->>'symbol', '') <> ''
+    )
+    SELECT
+        symbol,
+        CASE
+            WHEN COUNT(*) = 1 THEN MAX(roi)
+            WHEN SUM(volume) > 0 THEN SUM(roi * volume) / SUM(volume)
+            ELSE AVG(roi)
+        END,
+        SUM(volume),
+        SUM(num_trades)::integer,
+        SUM(profit)
+    FROM tokens
+    GROUP BY symbol
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION wallet_token_stats_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM wallet_token_stats s
+        USING old_rows o
+        WHERE s.wallet_address = o.wallet_address;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        -- Only wallets whose token_metrics actually changed are rewritten
+        DELETE FROM wallet_token_stats s
+        USING old_rows o
+        JOIN new_rows n ON n.wallet_address = o.wallet_address
+        WHERE s.wallet_address = o.wallet_address
+        AND n.token_metrics IS DISTINCT FROM o.token_metrics;
+
+        INSERT INTO wallet_token_stats (wallet_address, symbol, roi, volume, num_trades, profit)
+        SELECT n.wallet_address, t.*
+        FROM new_rows n
+        JOIN old_rows o ON o.wallet_address = n.wallet_address
+        CROSS JOIN LATERAL token_stats_from_metrics(n.token_metrics) t
+        WHERE n.token_metrics IS DISTINCT FROM o.token_metrics;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO wallet_token_stats (wallet_address, symbol, roi, volume, num_trades, profit)
+    SELECT n.wallet_address, t.*
+    FROM new_rows n
+    CROSS JOIN LATERAL token_stats_from_metrics(n.token_metrics) t;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables allow only one event per trigger
+DROP TRIGGER IF EXISTS wallet_analysis_token_stats_insert ON wallet_analysis;
+CREATE TRIGGER wallet_analysis_token_stats_insert
+    AFTER INSERT ON wallet_analysis
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_token_stats_apply();
+
+DROP TRIGGER IF EXISTS wallet_analysis_token_stats_update ON wallet_analysis;
+CREATE TRIGGER wallet_analysis_token_stats_update
+    AFTER UPDATE ON wallet_analysis
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_token_stats_apply();
+
+DROP TRIGGER IF EXISTS wallet_analysis_token_stats_delete ON wallet_analysis;
+CREATE TRIGGER wallet_analysis_token_stats_delete
+    AFTER DELETE ON wallet_analysis
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_token_stats_apply();
+
+-- Backfill from the existing wallets; the migration runs in one
+-- transaction, so no wallet is written twice
+TRUNCATE wallet_token_stats;
+INSERT INTO wallet_token_stats (wallet_address, symbol, roi, volume, num_trades, profit)
+SELECT wa.wallet_address, t.*
+FROM wallet_analysis wa
+CROSS JOIN LATERAL token_stats_from_metrics(wa.token_metrics) t;
+
+ANALYZE wallet_token_stats;
@@ -0,0 +1,29 @@
+-- Indexes behind the /wallets/top ranking scan. Every request filters
+-- roi_percentage >= 0 AND total_pnl_usd >= 0, so wallets failing those
+-- are left out of the partial indexes. The other filter columns are
+-- included, so the range filters are checked on index entries in an
+-- index-only scan instead of on heap rows.
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_top
+    ON wallet_scores (total_score DESC, wallet_address)
+    INCLUDE (roi_percentage, winrate, total_trades, total_volume, total_pnl_usd, risk_rating)
+    WHERE roi_percentage >= 0 AND total_pnl_usd >= 0;
+
+-- A high min_roi leaves few wallets, which are found faster through the
+-- roi_percentage range than by walking the ranking. The keyset pagination
+-- index gets the same included columns so that range is index-only too.
+DROP INDEX IF EXISTS idx_wallet_scores_page_roi_percentage;
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_page_roi_percentage
+    ON wallet_scores (roi_percentage, wallet_address)
+    INCLUDE (total_score, winrate, total_trades, total_volume, total_pnl_usd, risk_rating);
+
+-- risk_level is matched case-insensitively. The common case keeps using
+-- the ranking scan above; this serves lookups of a rare rating. Leading a
+-- ranking index with the rating made the planner walk every wallet of
+-- that rating even when a range filter was far more selective.
+CREATE INDEX IF NOT EXISTS idx_wallet_scores_risk_rating_lower
+    ON wallet_scores (LOWER(risk_rating));
+
+-- Matched risk_rating case-sensitively, which the filter no longer does
+DROP INDEX IF EXISTS idx_wallet_scores_risk_rating_score;
+
+ANALYZE wallet_scores;
@@ -0,0 +1,178 @@
+-- Keep wallet_stats_daily in sync with wallet_analysis by statement-level
+-- triggers instead of recomputing touched days from the score refresh.
+-- Counts and sums are applied as deltas of the rows entering and leaving
+-- a day, so a write costs O(changed rows) however many wallets share the
+-- day. pos_best_roi/pos_worst_roi only grow by GREATEST/LEAST; a day is
+-- rescanned only when a wallet holding one of its extremes leaves it.
+CREATE OR REPLACE FUNCTION wallet_stats_daily_apply() RETURNS trigger AS $$
+DECLARE
+    changes TEXT;
+    stale DATE[];
+BEGIN
+    -- Rows entering (+1) and leaving (-1) their day bucket. Updates that
+    -- keep a wallet's day, roi_percentage and winrate are skipped.
+    IF TG_OP = 'INSERT' THEN
+        changes := 'SELECT 1 AS sign, last_updated, roi_percentage, winrate FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        changes := 'SELECT -1 AS sign, last_updated, roi_percentage, winrate FROM old_rows';
+    ELSE
+        changes := $q$
+            SELECT -1 AS sign, o.last_updated, o.roi_percentage, o.winrate
+            FROM old_rows o
+            JOIN new_rows n ON n.wallet_address = o.wallet_address
+            WHERE (n.last_updated::date, n.roi_percentage, n.winrate)
+                IS DISTINCT FROM (o.last_updated::date, o.roi_percentage, o.winrate)
+            UNION ALL
+            SELECT 1, n.last_updated, n.roi_percentage, n.winrate
+            FROM new_rows n
+            JOIN old_rows o ON o.wallet_address = n.wallet_address
+            WHERE (n.last_updated::date, n.roi_percentage, n.winrate)
+                IS DISTINCT FROM (o.last_updated::date, o.roi_percentage, o.winrate)
+        $q$;
+    END IF;
+
+    -- Days are upserted in order so concurrent writers lock them in the
+    -- same order
+    EXECUTE format($q$
+        WITH c AS (
+            SELECT
+                sign,
+                COALESCE(last_updated::date, '-infinity'::date) AS day,
+                roi_percentage AS roi,
+                winrate,
+                roi_percentage > 0 AND winrate > 0 AS pos
+            FROM (%s) s
+        )
+        INSERT INTO wallet_stats_daily AS w (
+            day, wallet_count, roi_count, roi_sum, winrate_count, winrate_sum,
+            top_performers, pos_count, pos_roi_sum, pos_winrate_sum,
+            pos_best_roi, pos_worst_roi
+        )
+        SELECT
+            day,
+            SUM(sign),
+            COALESCE(SUM(sign) FILTER (WHERE roi IS NOT NULL), 0),
+            COALESCE(SUM(sign * roi), 0),
+            COALESCE(SUM(sign) FILTER (WHERE winrate IS NOT NULL), 0),
+            COALESCE(SUM(sign * winrate), 0),
+            COALESCE(SUM(sign) FILTER (WHERE roi > 50 AND winrate > 60), 0),
+            COALESCE(SUM(sign) FILTER (WHERE pos), 0),
+            COALESCE(SUM(sign * roi) FILTER (WHERE pos), 0),
+            COALESCE(SUM(sign * winrate) FILTER (WHERE pos), 0),
+            MAX(roi) FILTER (WHERE pos AND sign > 0),
+            MIN(roi) FILTER (WHERE pos AND sign > 0)
+        FROM c
+        GROUP BY day
+        ORDER BY day
+        ON CONFLICT (day) DO UPDATE SET
+            wallet_count = w.wallet_count + EXCLUDED.wallet_count,
+            roi_count = w.roi_count + EXCLUDED.roi_count,
+            roi_sum = w.roi_sum + EXCLUDED.roi_sum,
+            winrate_count = w.winrate_count + EXCLUDED.winrate_count,
+            winrate_sum = w.winrate_sum + EXCLUDED.winrate_sum,
+            top_performers = w.top_performers + EXCLUDED.top_performers,
+            pos_count = w.pos_count + EXCLUDED.pos_count,
+            pos_roi_sum = w.pos_roi_sum + EXCLUDED.pos_roi_sum,
+            pos_winrate_sum = w.pos_winrate_sum + EXCLUDED.pos_winrate_sum,
+            pos_best_roi = GREATEST(w.pos_best_roi, EXCLUDED.pos_best_roi),
+            pos_worst_roi = LEAST(w.pos_worst_roi, EXCLUDED.pos_worst_roi),
+            refreshed_at = NOW()
+    $q$, changes);
+
+    IF TG_OP = 'INSERT' THEN
+        RETURN NULL;
+    END IF;
+
+    -- Days whose best or worst ROI may have left with a removed wallet
+    EXECUTE format($q$
+        SELECT array_agg(w.day)
+        FROM (
+            SELECT
+                COALESCE(last_updated::date, '-infinity'::date) AS day,
+                MAX(roi_percentage) AS best,
+                MIN(roi_percentage) AS worst
+            FROM (%s) s
+            WHERE sign < 0 AND roi_percentage > 0 AND winrate > 0
+            GROUP BY 1
+        ) r
+        JOIN wallet_stats_daily w ON w.day = r.day
+        WHERE r.best >= w.pos_best_roi OR r.worst <= w.pos_worst_roi
+    $q$, changes) INTO stale;
+
+    IF stale IS NOT NULL THEN
+        UPDATE wallet_stats_daily w
+        SET pos_best_roi = e.best, pos_worst_roi = e.worst
+        FROM unnest(stale) AS d(day)
+        CROSS JOIN LATERAL (
+            SELECT MAX(roi_percentage) AS best, MIN(roi_percentage) AS worst
+            FROM wallet_analysis
+            WHERE roi_percentage > 0 AND winrate > 0
+            AND CASE
+                WHEN d.day = '-infinity'::date THEN last_updated IS NULL
+                ELSE last_updated >= d.day AND last_updated < d.day + 1
+            END
+        ) e
+        WHERE w.day = d.day;
+    END IF;
+
+    -- Drop days that lost their last wallet
+    DELETE FROM wallet_stats_daily WHERE wallet_count <= 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION wallet_stats_daily_clear() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM wallet_stats_daily;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables allow only one event per trigger
+DROP TRIGGER IF EXISTS wallet_analysis_stats_daily_insert ON wallet_analysis;
+CREATE TRIGGER wallet_analysis_stats_daily_insert
+    AFTER INSERT ON wallet_analysis
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_stats_daily_apply();
+
+DROP TRIGGER IF EXISTS wallet_analysis_stats_daily_update ON wallet_analysis;
+CREATE TRIGGER wallet_analysis_stats_daily_update
+    AFTER UPDATE ON wallet_analysis
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_stats_daily_apply();
+
+DROP TRIGGER IF EXISTS wallet_analysis_stats_daily_delete ON wallet_analysis;
+CREATE TRIGGER wallet_analysis_stats_daily_delete
+    AFTER DELETE ON wallet_analysis
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_stats_daily_apply();
+
+-- TRUNCATE skips the delete trigger
+DROP TRIGGER IF EXISTS wallet_analysis_stats_daily_truncate ON wallet_analysis;
+CREATE TRIGGER wallet_analysis_stats_daily_truncate
+    AFTER TRUNCATE ON wallet_analysis
+    FOR EACH STATEMENT EXECUTE FUNCTION wallet_stats_daily_clear();
+
+-- Rebuild from the existing wallets; the migration runs in one
+-- transaction, so no wallet is counted twice
+DELETE FROM wallet_stats_daily;
+INSERT INTO wallet_stats_daily (
+    day, wallet_count, roi_count, roi_sum, winrate_count, winrate_sum,
+    top_performers, pos_count, pos_roi_sum, pos_winrate_sum,
+    pos_best_roi, pos_worst_roi
+)
+SELECT
+    COALESCE(last_updated::date, '-infinity'::date),
+    COUNT(*),
+    COUNT(roi_percentage),
+    COALESCE(SUM(roi_percentage), 0),
+    COUNT(winrate),
+    COALESCE(SUM(winrate), 0),
+    COUNT(*) FILTER (WHERE roi_percentage > 50 AND winrate > 60),
+    COUNT(*) FILTER (WHERE roi_percentage > 0 AND winrate > 0),
+    COALESCE(SUM(roi_percentage) FILTER (WHERE roi_percentage > 0 AND winrate > 0), 0),
+    COALESCE(SUM(winrate) FILTER (WHERE roi_percentage > 0 AND winrate > 0), 0),
+    MAX(roi_percentage) FILTER (WHERE roi_percentage > 0 AND winrate > 0),
+    MIN(roi_percentage) FILTER (WHERE roi_percentage > 0 AND winrate > 0)
+FROM wallet_analysis
+GROUP BY 1;
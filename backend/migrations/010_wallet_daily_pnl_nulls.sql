@@ -0,0 +1,60 @@
+-- wallet_daily_pnl_apply as fixed in 004 for databases that applied the
+-- earlier version: trades without a wallet or a timestamp are skipped and
+-- trades without a price count as 0, instead of writing NULL into the
+-- rollup and aborting the trade's statement.
+CREATE OR REPLACE FUNCTION wallet_daily_pnl_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO wallet_daily_pnl AS p (wallet_address, day, trades, successful, daily_pnl)
+        SELECT
+            wallet_address,
+            DATE_TRUNC('day', created_at),
+            -COUNT(*),
+            -SUM(CASE WHEN status = 'executed' THEN 1 ELSE 0 END),
+            -COALESCE(SUM(CASE
+                WHEN trade_type = 'sell' AND status = 'executed'
+                THEN price_usd * amount
+                ELSE -price_usd * amount
+                END), 0)
+        FROM old_rows
+        WHERE wallet_address IS NOT NULL AND created_at IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (wallet_address, day) DO UPDATE SET
+            trades = p.trades + EXCLUDED.trades,
+            successful = p.successful + EXCLUDED.successful,
+            daily_pnl = p.daily_pnl + EXCLUDED.daily_pnl;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO wallet_daily_pnl AS p (wallet_address, day, trades, successful, daily_pnl)
+        SELECT
+            wallet_address,
+            DATE_TRUNC('day', created_at),
+            COUNT(*),
+            SUM(CASE WHEN status = 'executed' THEN 1 ELSE 0 END),
+            COALESCE(SUM(CASE
+                WHEN trade_type = 'sell' AND status = 'executed'
+                THEN price_usd * amount
+                ELSE -price_usd * amount
+                END), 0)
+        FROM new_rows
+        WHERE wallet_address IS NOT NULL AND created_at IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (wallet_address, day) DO UPDATE SET
+            trades = p.trades + EXCLUDED.trades,
+            successful = p.successful + EXCLUDED.successful,
+            daily_pnl = p.daily_pnl + EXCLUDED.daily_pnl;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        -- Drop days that no longer have any trades
+        DELETE FROM wallet_daily_pnl p
+        USING (SELECT DISTINCT wallet_address, DATE_TRUNC('day', created_at) AS day FROM old_rows) o
+        WHERE p.wallet_address = o.wallet_address
+          AND p.day = o.day
+          AND p.trades <= 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
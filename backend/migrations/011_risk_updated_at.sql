@@ -0,0 +1,12 @@
+-- Risk passes stamp risk_updated_at instead of last_updated, so
+-- last_updated keeps meaning the wallet's last ingest and the stats
+-- rollups and trends are not skewed by every wallet looking active.
+-- The score refresher detects changes on the later of the two stamps;
+-- wallet_scores.source_updated_at records that stamp from now on, which
+-- equals last_updated for every wallet scored so far.
+ALTER TABLE wallet_analysis ADD COLUMN IF NOT EXISTS risk_updated_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_wallet_analysis_changed_at
+    ON wallet_analysis ((GREATEST(last_updated, risk_updated_at)), wallet_address);
+
+ANALYZE wallet_analysis;
@@ -0,0 +1,85 @@
+import base64
+import json
+import os
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+
+# Sortable columns of wallet_scores, each backed by a
+# (column, wallet_address) index so keyset pages are index range scans.
+SORT_COLUMNS = {
+    "total_score": "ws.total_score",
+    "roi_percentage": "ws.roi_percentage",
+    "winrate": "ws.winrate",
+    "total_trades": "ws.total_trades",
+    "total_volume": "ws.total_volume",
+    "total_pnl_usd": "ws.total_pnl_usd",
+}
+
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "60"))
+
+_count_cache = {}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_by: str, sort_desc: bool, value, address: str) -> str:
+    """Opaque cursor pointing just past (value, address)"""
+    payload = json.dumps({"s": sort_by, "d": sort_desc, "v": value, "a": address}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_desc: bool) -> Tuple[object, str]:
+    """Return the (value, address) keyset of a cursor made for this sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, address = payload["v"], payload["a"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if payload.get("s") != sort_by or payload.get("d") != sort_desc:
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    if not isinstance(value, (int, float)) or not isinstance(address, str):
+        raise InvalidCursor("Malformed cursor")
+    return value, address
+
+
+def keyset_clause(sort_by: str, sort_desc: bool) -> Tuple[str, str]:
+    """WHERE and ORDER BY fragments for a keyset page on a whitelisted column.
+
+    The tiebreaker follows the sort direction so both fit one row
+    comparison and one (column, wallet_address) index scan.
+    """
+    column = SORT_COLUMNS[sort_by]
+    direction = "DESC" if sort_desc else "ASC"
+    comparison = "<" if sort_desc else ">"
+    where = f"({column}, ws.wallet_address) {comparison} (:cursor_value, :cursor_address)"
+    order_by = f"{column} {direction}, ws.wallet_address {direction}"
+    return where, order_by
+
+
+async def wallet_count(conn, exact: bool = False) -> Tuple[int, bool]:
+    """Number of scored wallets and whether it is an estimate.
+
+    The estimate comes from pg_class.reltuples and is cached for
+    COUNT_CACHE_TTL seconds. A table that was never analyzed has no
+    usable estimate, so it falls back to an exact count.
+    """
+    if not exact:
+        cached: Optional[Tuple[float, int, bool]] = _count_cache.get("wallet_scores")
+        if cached and time.monotonic() - cached[0] < COUNT_CACHE_TTL:
+            return cached[1], cached[2]
+
+        estimate = (await conn.execute(text(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = 'wallet_scores'::regclass"
+        ))).scalar()
+        if estimate is not None and estimate > 0:
+            _count_cache["wallet_scores"] = (time.monotonic(), int(estimate), True)
+            return int(estimate), True
+
+    total = (await conn.execute(text("SELECT COUNT(*) FROM wallet_scores"))).scalar()
+    _count_cache["wallet_scores"] = (time.monotonic(), int(total), False)
+    return int(total), False
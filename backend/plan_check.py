@@ -0,0 +1,55 @@
+"""Startup check that hot queries are planned on indexes.
+
+Representative queries are run through EXPLAIN and every sequential scan
+of a table with more than PLAN_CHECK_MIN_ROWS rows is logged as a
+warning. That usually means a migration did not run or the table's
+statistics are stale.
+"""
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import text
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+PLAN_CHECK = os.getenv("PLAN_CHECK", "1").lower() in ("1", "true", "yes")
+# Scanning a small table is often the best plan
+PLAN_CHECK_MIN_ROWS = int(os.getenv("PLAN_CHECK_MIN_ROWS", "10000"))
+
+
+def plan_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+async def check_plans(queries: Dict[str, Tuple[str, dict]], min_rows: int = PLAN_CHECK_MIN_ROWS) -> Dict[str, List[str]]:
+    """EXPLAIN each named (sql, params) query; returns the tables seq scanned"""
+    found = {}
+    async with engine.connect() as conn:
+        for name, (sql, params) in queries.items():
+            plan = (await conn.execute(text("EXPLAIN (FORMAT JSON) " + sql), params)).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            relations = {
+                node["Relation Name"] for node in plan_nodes(plan[0]["Plan"])
+                if node["Node Type"] == "Seq Scan"
+            }
+            large = []
+            for relation in sorted(relations):
+                rows = (await conn.execute(
+                    text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"), {"name": relation}
+                )).scalar() or 0
+                if rows > min_rows:
+                    large.append(relation)
+                    logger.warning(
+                        f"Query plan of {name} scans {relation} sequentially ({rows:.0f} rows); "
+                        f"check its indexes and run ANALYZE"
+                    )
+            found[name] = large
+    logger.info(f"Checked {len(queries)} query plans, {sum(map(len, found.values()))} sequential scans")
+    return found
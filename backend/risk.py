@@ -0,0 +1,293 @@
+"""Vectorized risk engine: max drawdown, Sharpe and Sortino ratios from trades.
+
+Realized PnL of each closed position is computed in SQL. Trades of a
+chunk of wallets are loaded sorted by (wallet, time) so each wallet is one
+contiguous slice, and every metric is computed for the whole chunk with
+grouped NumPy reductions. Results are merged into
+wallet_analysis.risk_metrics, which the score refresher picks up.
+
+    python risk.py --chunk-size 2000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import text
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+RISK_CHUNK_WALLETS = int(os.getenv("RISK_CHUNK_WALLETS", "2000"))
+DAYS_PER_YEAR = 365.0
+
+# Realized PnL of every executed sell, at the average cost of the tokens
+# the wallet bought before it; the part of a sell exceeding the tokens
+# bought is not counted. Sells that close nothing have NULL pnl. deployed
+# is the wallet's running net cash put in (buys minus sells), whose peak is
+# the capital at risk. Trades without a wallet, time or price are skipped.
+CHUNK_TRADES_QUERY = """
+WITH t AS (
+    SELECT
+        id,
+        wallet_address,
+        token_address,
+        created_at,
+        trade_type = 'sell' as is_sell,
+        amount::float8 as qty,
+        (price_usd * amount)::float8 as value
+    FROM trades
+    WHERE wallet_address = ANY(CAST(:wallets AS TEXT[]))
+    AND wallet_address IS NOT NULL
+    AND created_at IS NOT NULL
+    AND status = 'executed'
+    AND trade_type IN ('buy', 'sell')
+    AND price_usd IS NOT NULL
+    AND amount > 0
+), p AS (
+    SELECT
+        *,
+        SUM(qty) FILTER (WHERE NOT is_sell) OVER w as bought_qty,
+        SUM(value) FILTER (WHERE NOT is_sell) OVER w as bought_cost,
+        COALESCE(SUM(qty) FILTER (WHERE is_sell) OVER (
+            w ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+        ), 0) as sold_before,
+        SUM(CASE WHEN is_sell THEN -value ELSE value END) OVER (
+            PARTITION BY wallet_address ORDER BY created_at, id
+        ) as deployed
+    FROM t
+    WINDOW w AS (PARTITION BY wallet_address, token_address ORDER BY created_at, id)
+)
+SELECT
+    wallet_address,
+    EXTRACT(EPOCH FROM created_at)::float8 as ts,
+    CASE WHEN is_sell AND bought_qty > sold_before THEN
+        LEAST(qty, bought_qty - sold_before) * (value / qty - bought_cost / bought_qty)
+    END as pnl,
+    deployed
+FROM p
+ORDER BY wallet_address, created_at, id
+"""
+
+WALLET_CHUNK_QUERY = """
+SELECT wallet_address FROM wallet_analysis
+WHERE wallet_address > CAST(:after AS TEXT)
+ORDER BY wallet_address
+LIMIT :limit
+"""
+
+# Merge into the existing JSON so keys owned by ingestion survive; only
+# touch rows whose metrics actually changed so unchanged wallets are not
+# rescored. last_updated is left to ingestion: it drives the activity
+# trends, and a risk pass over every wallet would mark them all active.
+UPDATE_RISK_QUERY = """
+UPDATE wallet_analysis wa
+SET risk_metrics = COALESCE(wa.risk_metrics, '{}'::jsonb) || u.metrics,
+    risk_updated_at = NOW()
+FROM unnest(
+    CAST(:wallet_address AS TEXT[]),
+    CAST(CAST(:metrics AS TEXT[]) AS JSONB[])
+) AS u(wallet_address, metrics)
+WHERE wa.wallet_address = u.wallet_address
+AND COALESCE(wa.risk_metrics, '{}'::jsonb) || u.metrics IS DISTINCT FROM wa.risk_metrics
+"""
+
+
+def risk_rating(max_drawdown: float) -> str:
+    if max_drawdown < 20:
+        return "Low"
+    if max_drawdown < 50:
+        return "Medium"
+    return "High"
+
+
+def group_starts(keys: np.ndarray) -> np.ndarray:
+    """Start offsets of the runs of equal keys in a sorted array"""
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+
+
+def grouped_risk_metrics(
+    starts: np.ndarray,
+    pnl: np.ndarray,
+    capital: np.ndarray,
+    periods_per_year,
+) -> dict:
+    """Risk metrics of many PnL series laid out back to back.
+
+    ``starts`` are the offsets of each series in ``pnl``, ``capital`` the
+    per-series starting equity and ``periods_per_year`` a scalar or
+    per-series array used to annualize the ratios. Equity starts at
+    ``max(capital, deepest loss, 1)`` so it never goes below zero and the
+    drawdown stays within 0-100%. Returns per-series arrays.
+    """
+    n = len(pnl)
+    counts = np.diff(np.append(starts, n))
+    group = np.repeat(np.arange(len(starts)), counts)
+
+    # Grouped cumulative PnL: global cumsum minus the total before each run
+    cum = np.cumsum(pnl)
+    offsets = cum[starts] - pnl[starts]
+    cum -= offsets[group]
+
+    base = np.maximum(np.maximum(capital, -np.minimum.reduceat(cum, starts)), 1.0)
+    # Equity relative to the starting capital, >= 0
+    equity = 1.0 + cum / base[group]
+
+    # Grouped running max: lift each run above everything before it so one
+    # global maximum.accumulate never carries a peak across wallets
+    lift = group * (equity.max() + 1.0)
+    peak = np.maximum(np.maximum.accumulate(equity + lift) - lift, 1.0)
+    max_drawdown = np.clip(np.maximum.reduceat((peak - equity) / peak, starts) * 100, 0, 100)
+
+    returns = pnl / base[group]
+    mean = np.add.reduceat(returns, starts) / counts
+    std = np.sqrt(np.add.reduceat((returns - mean[group]) ** 2, starts) / counts)
+    downside = np.sqrt(np.add.reduceat(np.minimum(returns, 0) ** 2, starts) / counts)
+    scale = np.sqrt(periods_per_year)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * scale, 0.0)
+        sortino = np.where(downside > 0, mean / downside * scale, np.nan)
+
+    return {
+        "max_drawdown": max_drawdown,
+        "sharpe_ratio": sharpe,
+        "sortino_ratio": sortino,
+        "observations": counts,
+    }
+
+
+def metrics_record(metrics: dict, i: int) -> dict:
+    """risk_metrics JSON of series i. Series without observations and
+    non-finite values get the defaults of an empty series; JSONB rejects NaN"""
+    max_drawdown = float(metrics["max_drawdown"][i])
+    sharpe = float(metrics["sharpe_ratio"][i])
+    sortino = float(metrics["sortino_ratio"][i])
+    if not np.isfinite(max_drawdown):
+        max_drawdown = 0.0
+    return {
+        "max_drawdown": round(max_drawdown, 2),
+        "sharpe_ratio": round(sharpe, 4) if np.isfinite(sharpe) else 0.0,
+        "sortino_ratio": round(sortino, 4) if np.isfinite(sortino) else None,
+        "risk_rating": risk_rating(max_drawdown) if metrics["observations"][i] else "Medium",
+    }
+
+
+def series_risk_metrics(pnl: List[float], capital: float, periods_per_year: float = DAYS_PER_YEAR) -> dict:
+    """risk_metrics JSON of a single PnL series, e.g. daily PnL"""
+    if not pnl:
+        return {"max_drawdown": 0.0, "sharpe_ratio": 0.0, "sortino_ratio": None, "risk_rating": "Medium"}
+    metrics = grouped_risk_metrics(
+        np.zeros(1, dtype=np.int64),
+        np.asarray(pnl, dtype=np.float64),
+        np.array([capital], dtype=np.float64),
+        periods_per_year,
+    )
+    return metrics_record(metrics, 0)
+
+
+def trade_risk_metrics(wallets: np.ndarray, ts: np.ndarray, pnl: np.ndarray, deployed: np.ndarray) -> dict:
+    """Per-wallet risk metrics from trades sorted by (wallet, time).
+
+    Every closed position (a sell with non-NaN realized ``pnl``) is one
+    period, so buying alone is never scored as losing. Equity starts at
+    the wallet's peak ``deployed`` capital. Ratios are annualized by each
+    wallet's closing frequency over its active span (at least one day).
+    Wallets that closed nothing get the defaults of an empty series.
+    """
+    starts = group_starts(wallets)
+    ends = np.append(starts[1:], len(wallets)) - 1
+    span_days = np.maximum((ts[ends] - ts[starts]) / 86400.0, 1.0)
+    capital = np.maximum.reduceat(deployed, starts) if len(starts) else np.zeros(0)
+
+    count = len(starts)
+    metrics = {
+        "max_drawdown": np.zeros(count),
+        "sharpe_ratio": np.zeros(count),
+        "sortino_ratio": np.full(count, np.nan),
+        "observations": np.zeros(count, dtype=np.int64),
+    }
+    closed = np.flatnonzero(~np.isnan(pnl))
+    if len(closed):
+        group = np.repeat(np.arange(count), np.diff(np.append(starts, len(wallets))))[closed]
+        closed_starts = group_starts(group)
+        owners = group[closed_starts]
+        closes = np.diff(np.append(closed_starts, len(closed)))
+        closed_metrics = grouped_risk_metrics(
+            closed_starts,
+            pnl[closed],
+            capital[owners],
+            closes / span_days[owners] * DAYS_PER_YEAR,
+        )
+        for key, values in closed_metrics.items():
+            metrics[key][owners] = values
+
+    metrics["wallet_address"] = wallets[starts]
+    return metrics
+
+
+async def _load_chunk(conn, wallets: List[str]):
+    rows = (await conn.execute(text(CHUNK_TRADES_QUERY), {"wallets": wallets})).all()
+    count = len(rows)
+    return (
+        np.array([row[0] for row in rows], dtype=object),
+        np.fromiter((row[1] for row in rows), dtype=np.float64, count=count),
+        np.fromiter((np.nan if row[2] is None else row[2] for row in rows), dtype=np.float64, count=count),
+        np.fromiter((row[3] for row in rows), dtype=np.float64, count=count),
+    )
+
+
+async def refresh_risk_metrics(chunk_size: Optional[int] = None) -> dict:
+    """Recompute risk_metrics of every wallet with trades, chunk by chunk.
+
+    Memory is bounded by the trades of ``chunk_size`` wallets. Returns
+    counts of wallets examined and updated.
+    """
+    chunk_size = chunk_size or RISK_CHUNK_WALLETS
+    examined = updated = 0
+    after = ""
+
+    async with engine.connect() as conn:
+        while True:
+            wallets = (await conn.execute(
+                text(WALLET_CHUNK_QUERY), {"after": after, "limit": chunk_size}
+            )).scalars().all()
+            if not wallets:
+                break
+            after = wallets[-1]
+            examined += len(wallets)
+
+            addresses, ts, pnl, deployed = await _load_chunk(conn, list(wallets))
+            if len(addresses):
+                metrics = trade_risk_metrics(addresses, ts, pnl, deployed)
+                result = await conn.execute(text(UPDATE_RISK_QUERY), {
+                    "wallet_address": list(metrics["wallet_address"]),
+                    "metrics": [json.dumps(metrics_record(metrics, i)) for i in range(len(metrics["wallet_address"]))],
+                })
+                await conn.commit()
+                updated += result.rowcount
+
+            if len(wallets) < chunk_size:
+                break
+
+    logger.info(f"Risk metrics: examined {examined} wallets, updated {updated}")
+    return {"examined": examined, "updated": updated}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=RISK_CHUNK_WALLETS)
+    args = parser.parse_args()
+    print(json.dumps(await refresh_risk_metrics(args.chunk_size)))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""Daily wallet_analysis rollups behind /stats/overview.
+
+Triggers keep wallet_stats_daily current (migration 009). To rebuild it
+from scratch:
+
+    python rollups.py
+"""
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLUMNS = """
+    COUNT(*) as wallet_count,
+    COUNT(roi_percentage) as roi_count,
+    COALESCE(SUM(roi_percentage), 0) as roi_sum,
+    COUNT(winrate) as winrate_count,
+    COALESCE(SUM(winrate), 0) as winrate_sum,
+    COUNT(*) FILTER (WHERE roi_percentage > 50 AND winrate > 60) as top_performers,
+    COUNT(*) FILTER (WHERE roi_percentage > 0 AND winrate > 0) as pos_count,
+    COALESCE(SUM(roi_percentage) FILTER (WHERE roi_percentage > 0 AND winrate > 0), 0) as pos_roi_sum,
+    COALESCE(SUM(winrate) FILTER (WHERE roi_percentage > 0 AND winrate > 0), 0) as pos_winrate_sum,
+    MAX(roi_percentage) FILTER (WHERE roi_percentage > 0 AND winrate > 0) as pos_best_roi,
+    MIN(roi_percentage) FILTER (WHERE roi_percentage > 0 AND winrate > 0) as pos_worst_roi
+"""
+
+INSERT_COLUMNS = """
+    day, wallet_count, roi_count, roi_sum, winrate_count, winrate_sum,
+    top_performers, pos_count, pos_roi_sum, pos_winrate_sum,
+    pos_best_roi, pos_worst_roi
+"""
+
+REBUILD_QUERY = f"""
+INSERT INTO wallet_stats_daily ({INSERT_COLUMNS})
+SELECT COALESCE(last_updated::date, '-infinity'::date) as day, {ROLLUP_COLUMNS}
+FROM wallet_analysis
+GROUP BY 1
+"""
+
+OVERVIEW_QUERY = """
+SELECT
+    COALESCE(SUM(pos_count), 0) as total_wallets,
+    SUM(pos_roi_sum) / NULLIF(SUM(pos_count), 0) as avg_roi,
+    SUM(pos_winrate_sum) / NULLIF(SUM(pos_count), 0) as avg_winrate,
+    COALESCE(SUM(top_performers), 0) as top_performers,
+    MAX(pos_best_roi) as best_roi,
+    MIN(pos_worst_roi) as worst_roi
+FROM wallet_stats_daily
+"""
+
+# Trailing window of :days days (today included) against the window
+# before it. SUM over BIGINT is NUMERIC, so the ratios are not truncated.
+TRENDS_QUERY = """
+WITH windows AS (
+    SELECT
+        SUM(roi_sum) FILTER (WHERE day > CURRENT_DATE - CAST(:days AS INTEGER))
+            / NULLIF(SUM(roi_count) FILTER (WHERE day > CURRENT_DATE - CAST(:days AS INTEGER)), 0) as curr_roi,
+        SUM(winrate_sum) FILTER (WHERE day > CURRENT_DATE - CAST(:days AS INTEGER))
+            / NULLIF(SUM(winrate_count) FILTER (WHERE day > CURRENT_DATE - CAST(:days AS INTEGER)), 0) as curr_winrate,
+        SUM(wallet_count) FILTER (WHERE day > CURRENT_DATE - CAST(:days AS INTEGER)) as curr_wallet_count,
+        SUM(top_performers) FILTER (WHERE day > CURRENT_DATE - CAST(:days AS INTEGER)) as curr_top_performers,
+        SUM(roi_sum) FILTER (WHERE day <= CURRENT_DATE - CAST(:days AS INTEGER))
+            / NULLIF(SUM(roi_count) FILTER (WHERE day <= CURRENT_DATE - CAST(:days AS INTEGER)), 0) as prev_roi,
+        SUM(winrate_sum) FILTER (WHERE day <= CURRENT_DATE - CAST(:days AS INTEGER))
+            / NULLIF(SUM(winrate_count) FILTER (WHERE day <= CURRENT_DATE - CAST(:days AS INTEGER)), 0) as prev_winrate,
+        SUM(wallet_count) FILTER (WHERE day <= CURRENT_DATE - CAST(:days AS INTEGER)) as prev_wallet_count,
+        SUM(top_performers) FILTER (WHERE day <= CURRENT_DATE - CAST(:days AS INTEGER)) as prev_top_performers
+    FROM wallet_stats_daily
+    WHERE day > CURRENT_DATE - 2 * CAST(:days AS INTEGER)
+)
+SELECT 
+    ROUND(((curr_roi - prev_roi) / NULLIF(prev_roi, 0) * 100)::numeric, 2) as roi_change,
+    ROUND(((curr_winrate - prev_winrate) / NULLIF(prev_winrate, 0) * 100)::numeric, 2) as winrate_change,
+    ROUND(((curr_wallet_count - prev_wallet_count) / NULLIF(prev_wallet_count, 0) * 100)::numeric, 2) as wallet_count_change,
+    ROUND(((curr_top_performers - prev_top_performers) / NULLIF(prev_top_performers, 0) * 100)::numeric, 2) as top_performers_change
+FROM windows
+"""
+
+
+async def rebuild_daily_rollups():
+    """Recompute every rollup row in one pass over wallet_analysis.
+
+    The triggers of migration 009 keep the rows current; this repairs
+    them, e.g. after wallet_analysis was loaded with triggers disabled.
+    The table lock makes concurrent rebuilds and trigger updates wait.
+    """
+    async with engine.connect() as conn:
+        await conn.execute(text("LOCK TABLE wallet_stats_daily IN EXCLUSIVE MODE"))
+        await conn.execute(text("DELETE FROM wallet_stats_daily"))
+        await conn.execute(text(REBUILD_QUERY))
+        await conn.commit()
+
+
+async def fetch_overview(conn, trend_days: int = 7):
+    """Overview totals and trends from the rollup rows"""
+    basic_stats = (await conn.execute(text(OVERVIEW_QUERY))).first()
+    trends = (await conn.execute(text(TRENDS_QUERY), {"days": trend_days})).first()
+    return basic_stats, trends
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(rebuild_daily_rollups())
+    logger.info("Rebuilt stats rollups")
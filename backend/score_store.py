@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import os
+import inspect
+from datetime import timedelta
+from typing import Callable, List, Optional
+
+import asyncpg
+from sqlalchemy import text
+
+from database import DATABASE_URL, engine
+from migrate import _driver_dsn
+from scoring import score_wallets
+
+logger = logging.getLogger(__name__)
+
+SCORE_REFRESH_INTERVAL = float(os.getenv("SCORE_REFRESH_INTERVAL", "30"))
+SCORE_REFRESH_BATCH = int(os.getenv("SCORE_REFRESH_BATCH", "5000"))
+# Every Nth refresh is a full pass, catching deletes and backdated rows
+SCORE_FULL_REFRESH_EVERY = int(os.getenv("SCORE_FULL_REFRESH_EVERY", "120"))
+# Seconds the incremental pass looks back past the watermark. Writers
+# stamp wallets with their transaction's start time, so a long
+# transaction commits rows older than ones already scored.
+SCORE_REFRESH_LAG = float(os.getenv("SCORE_REFRESH_LAG", "300"))
+# Advisory lock held by the one worker that runs the refresher
+SCORE_LEADER_LOCK_ID = 72707302
+
+# Callbacks run with the list of changed rows after each refresh that
+# rescored at least one wallet
+_change_listeners: List[Callable] = []
+
+# Wallets changed since the watermark, in (changed_at, wallet_address)
+# order so large backlogs are consumed in keyset batches. changed_at is
+# the later of the ingest (last_updated) and risk pass (risk_updated_at)
+# stamps. Wallets with neither cannot be ordered against the watermark
+# and are always examined; once scored the IS DISTINCT FROM filter skips
+# them.
+CHANGED_WALLETS_QUERY = """
+SELECT
+    wa.wallet_address,
+    wa.total_pnl_usd,
+    wa.winrate,
+    wa.total_trades,
+    wa.roi_percentage,
+    wa.total_volume,
+    wa.consistency_score,
+    wa.risk_metrics,
+    wa.last_updated,
+    GREATEST(wa.last_updated, wa.risk_updated_at) as changed_at,
+    ws.source_updated_at as previous_updated_at,
+    ws.wallet_address IS NOT NULL as previously_scored,
+    ARRAY(
+        SELECT ts.symbol FROM wallet_token_stats ts WHERE ts.wallet_address = wa.wallet_address
+    ) as token_symbols
+FROM wallet_analysis wa
+LEFT JOIN wallet_scores ws ON ws.wallet_address = wa.wallet_address
+WHERE (
+    CAST(:after_updated AS TIMESTAMP) IS NULL
+    OR GREATEST(wa.last_updated, wa.risk_updated_at) IS NULL
+    OR (GREATEST(wa.last_updated, wa.risk_updated_at), wa.wallet_address)
+        > (CAST(:after_updated AS TIMESTAMP), CAST(:after_address AS TEXT))
+)
+AND (
+    ws.wallet_address IS NULL
+    OR GREATEST(wa.last_updated, wa.risk_updated_at) IS DISTINCT FROM ws.source_updated_at
+)
+ORDER BY GREATEST(wa.last_updated, wa.risk_updated_at) NULLS FIRST, wa.wallet_address
+LIMIT :limit
+"""
+
+UPSERT_SCORES_QUERY = """
+INSERT INTO wallet_scores (
+    wallet_address, total_score, roi_score, consistency_score, volume_score,
+    trade_score, risk_score, roi_percentage, winrate, total_trades,
+    total_volume, total_pnl_usd, max_drawdown, sharpe_ratio, risk_rating,
+    source_updated_at, scored_at
+)
+SELECT *, NOW() FROM unnest(
+    CAST(:wallet_address AS TEXT[]),
+    CAST(:total_score AS DOUBLE PRECISION[]),
+    CAST(:roi_score AS DOUBLE PRECISION[]),
+    CAST(:consistency_score AS DOUBLE PRECISION[]),
+    CAST(:volume_score AS DOUBLE PRECISION[]),
+    CAST(:trade_score AS DOUBLE PRECISION[]),
+    CAST(:risk_score AS DOUBLE PRECISION[]),
+    CAST(:roi_percentage AS DOUBLE PRECISION[]),
+    CAST(:winrate AS DOUBLE PRECISION[]),
+    CAST(:total_trades AS INTEGER[]),
+    CAST(:total_volume AS DOUBLE PRECISION[]),
+    CAST(:total_pnl_usd AS DOUBLE PRECISION[]),
+    CAST(:max_drawdown AS DOUBLE PRECISION[]),
+    CAST(:sharpe_ratio AS DOUBLE PRECISION[]),
+    CAST(:risk_rating AS TEXT[]),
+    CAST(:source_updated_at AS TIMESTAMP[])
+)
+ON CONFLICT (wallet_address) DO UPDATE SET
+    total_score = EXCLUDED.total_score,
+    roi_score = EXCLUDED.roi_score,
+    consistency_score = EXCLUDED.consistency_score,
+    volume_score = EXCLUDED.volume_score,
+    trade_score = EXCLUDED.trade_score,
+    risk_score = EXCLUDED.risk_score,
+    roi_percentage = EXCLUDED.roi_percentage,
+    winrate = EXCLUDED.winrate,
+    total_trades = EXCLUDED.total_trades,
+    total_volume = EXCLUDED.total_volume,
+    total_pnl_usd = EXCLUDED.total_pnl_usd,
+    max_drawdown = EXCLUDED.max_drawdown,
+    sharpe_ratio = EXCLUDED.sharpe_ratio,
+    risk_rating = EXCLUDED.risk_rating,
+    source_updated_at = EXCLUDED.source_updated_at,
+    scored_at = EXCLUDED.scored_at
+"""
+
+DELETE_ORPHANS_QUERY = """
+DELETE FROM wallet_scores ws
+WHERE NOT EXISTS (
+    SELECT 1 FROM wallet_analysis wa WHERE wa.wallet_address = ws.wallet_address
+)
+RETURNING ws.wallet_address, ws.source_updated_at
+"""
+
+
+def _float(value) -> float:
+    return float(value) if value is not None else 0.0
+
+
+def build_score_rows(rows: List) -> List[dict]:
+    """Turn changed wallet_analysis rows into wallet_scores rows"""
+    scores = score_wallets(rows, decode_tokens=False)
+    records = []
+    for row, score in zip(rows, scores):
+        risk = score['risk_metrics'] or {}
+        total_trades = int(row['total_trades'] or 0)
+        records.append({
+            "wallet_address": row['wallet_address'],
+            "total_score": score['total_score'],
+            "roi_score": score['roi_score'],
+            "consistency_score": score['consistency_score'],
+            "volume_score": score['volume_score'],
+            "trade_score": score['trade_score'],
+            "risk_score": score['risk_score'],
+            "roi_percentage": _float(row['roi_percentage']),
+            "winrate": _float(row['winrate']),
+            "total_trades": total_trades,
+            "total_volume": _float(row['total_volume']),
+            "total_pnl_usd": _float(row['total_pnl_usd']),
+            "max_drawdown": _float(risk.get('max_drawdown')),
+            "sharpe_ratio": _float(risk.get('sharpe_ratio')),
+            "risk_rating": risk.get('risk_rating') or 'Medium',
+            "source_updated_at": row['changed_at'],
+        })
+    return records
+
+
+async def _upsert_scores(conn, records: List[dict]):
+    columns = {key: [record[key] for record in records] for key in records[0]}
+    await conn.execute(text(UPSERT_SCORES_QUERY), columns)
+
+
+async def refresh_wallet_scores(full: bool = False, batch_size: Optional[int] = None) -> List[dict]:
+    """Rescore wallets ingested or risk-scored since they were last scored.
+
+    Only rows updated at most SCORE_REFRESH_LAG seconds before the newest
+    scored ``source_updated_at`` are examined, so a refresh with no
+    changes is a short index range scan. With
+    ``full=True`` every wallet is compared and scores of deleted wallets are
+    dropped. Returns the changed rows, each with the new scores, the
+    ``previous_updated_at`` it was scored at before, whether it had
+    been scored at all (``previously_scored``) and the symbols of the
+    tokens it traded (``token_symbols``). Dropped wallets are
+    reported with ``deleted=True`` and no scores.
+    """
+    batch_size = batch_size or SCORE_REFRESH_BATCH
+    changes = []
+
+    async with engine.connect() as conn:
+        after_updated, after_address = None, None
+        if not full:
+            watermark = (await conn.execute(
+                text("SELECT MAX(source_updated_at) FROM wallet_scores")
+            )).scalar()
+            if watermark is not None:
+                # Rows inside the lag window are re-checked, unchanged ones
+                # are skipped by the IS DISTINCT FROM filter.
+                after_updated, after_address = watermark - timedelta(seconds=SCORE_REFRESH_LAG), ""
+
+        while True:
+            rows = (await conn.execute(
+                text(CHANGED_WALLETS_QUERY),
+                {
+                    "after_updated": after_updated,
+                    "after_address": after_address,
+                    "limit": batch_size
+                }
+            )).mappings().all()
+            if not rows:
+                break
+
+            records = build_score_rows(rows)
+            await _upsert_scores(conn, records)
+            await conn.commit()
+
+            for row, record in zip(rows, records):
+                record["previous_updated_at"] = row['previous_updated_at']
+                record["previously_scored"] = row['previously_scored']
+                record["token_symbols"] = row['token_symbols']
+                record["deleted"] = False
+            changes.extend(records)
+
+            if len(rows) < batch_size:
+                break
+            # Rows just scored no longer match the IS DISTINCT FROM filter,
+            # the keyset only saves rescanning them. NULL timestamps cannot
+            # be paged on, so those batches simply re-run the query.
+            last = rows[-1]
+            if last['changed_at'] is not None:
+                after_updated, after_address = last['changed_at'], last['wallet_address']
+
+        if full:
+            deleted = (await conn.execute(text(DELETE_ORPHANS_QUERY))).mappings().all()
+            await conn.commit()
+            changes.extend({
+                "wallet_address": row['wallet_address'],
+                "source_updated_at": None,
+                "previous_updated_at": row['source_updated_at'],
+                "previously_scored": True,
+                "deleted": True,
+            } for row in deleted)
+
+    if changes:
+        logger.info(f"Rescored {len(changes)} wallets")
+    return changes
+
+
+def add_change_listener(callback: Callable):
+    """Register a sync or async callback for rescored wallets"""
+    _change_listeners.append(callback)
+
+
+async def notify_change_listeners(changes: List[dict]):
+    for callback in _change_listeners:
+        try:
+            result = callback(changes)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"Error in score change listener {callback.__name__}: {e}")
+
+
+async def score_refresher(interval: Optional[float] = None):
+    """Background task that keeps wallet_scores in sync with wallet_analysis"""
+    interval = interval or SCORE_REFRESH_INTERVAL
+    cycle = 0
+    while True:
+        try:
+            full = cycle % SCORE_FULL_REFRESH_EVERY == 0
+            cycle += 1
+            changes = await refresh_wallet_scores(full=full)
+            if changes:
+                await notify_change_listeners(changes)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error refreshing wallet scores: {e}")
+        await asyncio.sleep(interval)
+
+
+async def leader_score_refresher(interval: Optional[float] = None):
+    """Run score_refresher in only one of the API's worker processes.
+
+    The worker holding an advisory lock is the leader; the lock lives as
+    long as its connection, which is pinged every interval. The others
+    retry every interval, so one of them takes over when the leader goes
+    away. Change listeners therefore run once per refresh, in the leader.
+    """
+    interval = interval or SCORE_REFRESH_INTERVAL
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(_driver_dsn(DATABASE_URL))
+            if await conn.fetchval("SELECT pg_try_advisory_lock($1)", SCORE_LEADER_LOCK_ID):
+                logger.info(f"Worker {os.getpid()} runs the score refresher")
+                refresher = asyncio.create_task(score_refresher(interval))
+                try:
+                    while not refresher.done():
+                        await asyncio.sleep(interval)
+                        await conn.fetchval("SELECT 1")
+                finally:
+                    refresher.cancel()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in score refresher leader election: {e}")
+        finally:
+            if conn is not None:
+                conn.terminate()
+        await asyncio.sleep(interval)
@@ -0,0 +1,166 @@
+import json
+import logging
+from typing import Any, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Score weights, shared by every endpoint that ranks wallets
+ROI_WEIGHT = 0.3
+CONSISTENCY_WEIGHT = 0.3
+VOLUME_WEIGHT = 0.2
+TRADE_WEIGHT = 0.2
+
+# Values at which a component score saturates at 100
+ROI_CAP = 100.0
+VOLUME_CAP = 100000.0
+TRADES_CAP = 200.0
+
+DEFAULT_CONSISTENCY = 50.0
+
+
+def decode_json(value: Any, default: Any) -> Tuple[Any, bool]:
+    """Decode a JSON column value once.
+
+    Drivers hand JSONB back either as text or as already decoded Python
+    objects, so both are accepted. Returns ``(value, ok)``; ``ok`` is False
+    when the text could not be parsed.
+    """
+    if value is None:
+        return default, True
+    if isinstance(value, (bytes, bytearray, str)):
+        if not value:
+            return default, True
+        try:
+            return json.loads(value), True
+        except ValueError:
+            return default, False
+    if isinstance(value, float) and np.isnan(value):
+        return default, True
+    return value, True
+
+
+def _column(rows: Sequence[Mapping], key: str) -> np.ndarray:
+    """Pull one numeric column out of the rows, NULLs become NaN"""
+    return np.fromiter(
+        (np.nan if row[key] is None else float(row[key]) for row in rows),
+        dtype=np.float64,
+        count=len(rows),
+    )
+
+
+def score_arrays(
+    roi: np.ndarray,
+    consistency: np.ndarray,
+    volume: np.ndarray,
+    trades: np.ndarray,
+    max_drawdown: np.ndarray,
+) -> dict:
+    """Vectorized wallet scoring over whole columns.
+
+    Inputs are float arrays with NaN for missing values. Returns a dict of
+    score arrays rounded to two decimals.
+    """
+    with np.errstate(invalid="ignore"):
+        roi_score = np.where(np.isnan(roi), 0.0, np.clip(roi / ROI_CAP, 0, 1) * 100)
+        consistency = np.where(np.isnan(consistency), DEFAULT_CONSISTENCY, consistency)
+        volume_score = np.where(np.isnan(volume), 0.0, np.minimum(volume / VOLUME_CAP, 1) * 100)
+        trade_score = np.where(np.isnan(trades), 0.0, np.minimum(trades / TRADES_CAP, 1) * 100)
+
+    total_score = (
+        roi_score * ROI_WEIGHT +
+        consistency * CONSISTENCY_WEIGHT +
+        volume_score * VOLUME_WEIGHT +
+        trade_score * TRADE_WEIGHT
+    )
+    risk_score = 100 - np.nan_to_num(max_drawdown, nan=0.0)
+
+    return {
+        "total_score": np.round(total_score, 2),
+        "roi_score": np.round(roi_score, 2),
+        "consistency_score": np.round(consistency, 2),
+        "volume_score": np.round(volume_score, 2),
+        "trade_score": np.round(trade_score, 2),
+        "risk_score": np.round(risk_score, 2),
+    }
+
+
+def score_wallets(rows: Sequence[Mapping], decode_tokens: bool = True) -> List[dict]:
+    """Score a whole result set in one vectorized pass.
+
+    ``rows`` are mappings with the ``wallet_analysis`` columns. The
+    ``risk_metrics`` and ``token_metrics`` columns are each decoded at most
+    once; the decoded values are returned alongside the scores so callers
+    never parse them again. With ``decode_tokens=False`` token metrics are
+    passed through untouched.
+    """
+    if not rows:
+        return []
+
+    risk_metrics = []
+    token_metrics = []
+    valid = np.ones(len(rows), dtype=bool)
+    for i, row in enumerate(rows):
+        risk, risk_ok = decode_json(row.get('risk_metrics'), {})
+        if decode_tokens:
+            tokens, tokens_ok = decode_json(row.get('token_metrics'), [])
+        else:
+            tokens, tokens_ok = row.get('token_metrics'), True
+        if not (risk_ok and tokens_ok) or not isinstance(risk, dict):
+            logger.error(f"Error calculating wallet scores: invalid JSON metrics for {row.get('wallet_address')}")
+            valid[i] = False
+            risk, tokens = {}, []
+        risk_metrics.append(risk)
+        token_metrics.append(tokens)
+
+    try:
+        max_drawdown = np.fromiter(
+            (float(risk.get('max_drawdown', 0) or 0) for risk in risk_metrics),
+            dtype=np.float64,
+            count=len(rows),
+        )
+        scores = score_arrays(
+            _column(rows, 'roi_percentage'),
+            _column(rows, 'consistency_score'),
+            _column(rows, 'total_volume'),
+            _column(rows, 'total_trades'),
+            max_drawdown,
+        )
+    except (TypeError, ValueError) as e:
+        logger.error(f"Error calculating wallet scores: {e}")
+        return [default_scores() for _ in rows]
+
+    columns = {name: values.tolist() for name, values in scores.items()}
+    valid = valid.tolist()
+    results = []
+    for i in range(len(rows)):
+        if not valid[i]:
+            results.append(default_scores())
+            continue
+        results.append({
+            "total_score": columns["total_score"][i],
+            "roi_score": columns["roi_score"][i],
+            "consistency_score": columns["consistency_score"][i],
+            "volume_score": columns["volume_score"][i],
+            "trade_score": columns["trade_score"][i],
+            "risk_score": columns["risk_score"][i],
+            "risk_metrics": risk_metrics[i],
+            "token_stats": token_metrics[i],
+        })
+    return results
+
+
+def default_scores() -> dict:
+    """Scores reported for a wallet whose data could not be scored"""
+    return {
+        "total_score": 0,
+        "roi_score": 0,
+        "consistency_score": 0,
+        "volume_score": 0,
+        "trade_score": 0,
+        "risk_score": 0,
+        "risk_metrics": {},
+        "token_stats": []
+    }
+
@@ -0,0 +1,56 @@
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+
+from metrics import timed
+
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any):
+    """Types orjson does not handle natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="python")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize straight to bytes, skipping jsonable_encoder"""
+    with timed("serialization"):
+        return orjson.dumps(content, default=_default, option=DUMPS_OPTIONS)
+
+
+def raw_json(value: Optional[str], default: bytes = b"null") -> orjson.Fragment:
+    """Embed already-serialized JSON (e.g. JSONB cast to text) as is.
+
+    Postgres has already validated the text, so it is spliced into the
+    output without a decode/encode round trip.
+    """
+    if value is None:
+        return orjson.Fragment(default)
+    return orjson.Fragment(value)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by orjson without jsonable_encoder.
+
+    Only for content built from trusted rows: plain dicts, lists, numbers,
+    datetimes, Decimals and raw_json fragments.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """The default ORJSONResponse, with rendering counted as serialization time"""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialization"):
+            return super().render(content)
@@ -0,0 +1,86 @@
+"""Production launcher: several uvicorn workers sharing one socket.
+
+    python serve.py --workers 4 --connection-budget 60
+
+Before any worker starts, the launcher applies the migrations, checks
+the query plans and warms the shared response cache, so workers only
+copy /stats/overview and the default /wallets/top from it. The
+connection budget is divided between the workers' pools. Without
+CACHE_URL an in-memory Redis stand-in runs in the launcher process for
+the workers to share; set CACHE_URL=redis://host:port to use a real
+Redis instead.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import threading
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# Postgres ships with max_connections = 100; the rest is left for
+# ingestion, backtests and admin sessions
+DEFAULT_CONNECTION_BUDGET = 60
+
+
+def start_shared_store() -> str:
+    """Run the in-memory store on a background thread; returns its URL"""
+    from shared_store import SharedStoreServer
+
+    loop = asyncio.new_event_loop()
+    server = SharedStoreServer()
+    url = loop.run_until_complete(server.start())
+    threading.Thread(target=loop.run_forever, daemon=True, name="shared-store").start()
+    return url
+
+
+async def prepare():
+    """Startup work done once for all workers"""
+    # Imported here so the engine is built with the environment set above
+    from app import check_top_wallets_plans, engine, response_cache, warm_cache
+    from migrate import run_migrations
+    from plan_check import PLAN_CHECK
+
+    await run_migrations()
+    if PLAN_CHECK:
+        await check_top_wallets_plans()
+    await response_cache.sync_generation()
+    await warm_cache()
+    await engine.dispose()
+    await response_cache.shared.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument(
+        "--connection-budget", type=int,
+        default=int(os.getenv("DB_CONNECTION_BUDGET", str(DEFAULT_CONNECTION_BUDGET))),
+        help="database connections across all workers"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    # Workers are spawned, so they read their settings from the environment
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    os.environ["DB_CONNECTION_BUDGET"] = str(args.connection_budget)
+    if not os.getenv("CACHE_URL"):
+        os.environ["CACHE_URL"] = start_shared_store()
+        logger.info(f"Shared response store listening on {os.environ['CACHE_URL']}")
+
+    asyncio.run(prepare())
+    os.environ["SERVE_PREPARED"] = "1"
+
+    from database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+    logger.info(
+        f"Starting {args.workers} workers, pool_size={DB_POOL_SIZE} max_overflow={DB_MAX_OVERFLOW} each"
+    )
+    uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Key-value store shared by the worker processes of one deployment.
+
+Speaks the subset of the Redis protocol the response cache needs: GET,
+SET with PX, INCR, DEL and PING. ``CACHE_URL`` may point at a real Redis
+(``redis://host:port``); otherwise serve.py runs SharedStoreServer, an
+in-memory stand-in, in the launcher process.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+SHARED_STORE_CONNECTIONS = int(os.getenv("SHARED_STORE_CONNECTIONS", "4"))
+SHARED_STORE_TIMEOUT = float(os.getenv("SHARED_STORE_TIMEOUT", "0.5"))
+SHARED_STORE_MAX_ENTRIES = int(os.getenv("SHARED_STORE_MAX_ENTRIES", "4096"))
+
+
+class SharedStoreError(Exception):
+    pass
+
+
+def encode_command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("shared store closed the connection")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        raise SharedStoreError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        if size < 0:
+            return None
+        return (await reader.readexactly(size + 2))[:-2]
+    if kind == b"*":
+        size = int(rest)
+        if size < 0:
+            return None
+        return [await read_reply(reader) for _ in range(size)]
+    raise SharedStoreError(f"unexpected reply {line!r}")
+
+
+class SharedStore:
+    """Client with a small pool of connections, opened on first use"""
+
+    def __init__(self, url: str, connections: int = SHARED_STORE_CONNECTIONS, timeout: float = SHARED_STORE_TIMEOUT):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.timeout = timeout
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(connections)
+
+    async def execute(self, *args):
+        async with self._slots:
+            if self._idle:
+                reader, writer = self._idle.pop()
+            else:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout
+                )
+            try:
+                writer.write(encode_command(*args))
+                reply = await asyncio.wait_for(read_reply(reader), self.timeout)
+            except BaseException:
+                # The reply may still arrive; the connection is out of sync
+                writer.close()
+                raise
+            self._idle.append((reader, writer))
+            return reply
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.execute("SET", key, value, "PX", max(int(ttl * 1000), 1))
+
+    async def incr(self, key: str) -> int:
+        return await self.execute("INCR", key)
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+class SharedStoreServer:
+    """In-memory stand-in for Redis, bounded to max_entries in LRU order"""
+
+    def __init__(self, max_entries: int = SHARED_STORE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key -> (value, monotonic expiry or None)
+        self._data: "OrderedDict[bytes, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _set(self, key: bytes, value: bytes, expires_at: Optional[float]):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def _command(self, args: List[bytes]):
+        name = args[0].upper()
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name == b"GET" and len(args) == 2:
+            value = self._get(args[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET" and len(args) in (3, 5):
+            expires_at = None
+            if len(args) == 5:
+                if args[3].upper() != b"PX":
+                    return b"-ERR only PX is supported\r\n"
+                expires_at = time.monotonic() + int(args[4]) / 1000
+            self._set(args[1], args[2], expires_at)
+            return b"+OK\r\n"
+        if name == b"INCR" and len(args) == 2:
+            try:
+                value = int(self._get(args[1]) or 0) + 1
+            except ValueError:
+                return b"-ERR value is not an integer\r\n"
+            self._set(args[1], str(value).encode(), None)
+            return b":%d\r\n" % value
+        if name == b"DEL" and len(args) >= 2:
+            removed = sum(self._data.pop(key, None) is not None for key in args[1:])
+            return b":%d\r\n" % removed
+        return b"-ERR unsupported command '%s'\r\n" % name
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    args = await read_reply(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                if not isinstance(args, list) or not args:
+                    writer.write(b"-ERR expected a command array\r\n")
+                else:
+                    writer.write(self._command(args))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Listen and return the URL clients connect to"""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}"
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._data), "max_entries": self.max_entries}